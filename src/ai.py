@@ -1,11 +1,175 @@
 import chess
+import math
 import random
+import time
+from transposition import TranspositionTable, position_key, EXACT, LOWERBOUND, UPPERBOUND
+from book import OpeningBook
+from move_ordering import MoveOrderer
+from tablebase import Tablebase
+from telemetry import SearchStats, ConsoleSink, publish
+from numpy_eval import NumpyEvaluator
+
+# Deepest iteration tried when only a time or node budget limits the search
+MAX_DEPTH = 64
+
+# How many nodes are searched between two clock / stop-request checks
+TIME_CHECK_INTERVAL = 256
+
+# Centipawns per unit of the piece values and tables below (a pawn is worth 10.0 there)
+CENTIPAWNS_PER_UNIT = 10
+# Search scores are whole centipawns. Being mated `ply` plies from the root scores
+# ply - MATE_SCORE, so shorter mates score higher for the winner.
+MATE_SCORE = 32000
+# Scores beyond this are mates (no line is searched this many plies deep)
+MATE_BOUND = MATE_SCORE - 1000
+
+# Fixed-depth searches go to DEFAULT_DEPTH, and to endgame_depth once ENDGAME_PIECES or fewer pieces are left
+DEFAULT_DEPTH = 3
+ENDGAME_DEPTH = 5
+ENDGAME_PIECES = 10
+
+# Half-width in centipawns of the root window around the previous iteration's score
+ASPIRATION_WINDOW = 50
+# A window side that fails this wide is opened up completely
+ASPIRATION_MAX = 800
+
+
+def score_to_centipawns(score):
+    """Convert a search score (side to move's view) to whole centipawns."""
+    return int(score)
+
+
+def mate_distance(score):
+    """Moves until mate for a mate score (negative: getting mated), None for other scores."""
+    if abs(score) < MATE_BOUND:
+        return None
+    moves = (MATE_SCORE - abs(score) + 1) // 2
+    return moves if score > 0 else -moves
+
+
+def format_score(score):
+    """A search score as UCI prints it: 'cp 35' or 'mate 3'."""
+    mate = mate_distance(score)
+    return f"mate {mate}" if mate is not None else f"cp {score_to_centipawns(score)}"
+
+
+def fixed_depth(board, depth, endgame_depth, tablebase):
+    """Depth of a fixed-depth search of board (shared by ChessAI and ParallelSearch).
+
+    depth, or DEFAULT_DEPTH if None; endgame_depth instead in endgames,
+    unless the tablebase can probe this position (its tables cover these
+    pieces and the files are on disk), so the search can rely on it.
+    """
+    if depth is None:
+        depth = DEFAULT_DEPTH
+    if endgame_depth is not None and len(board.piece_map()) <= ENDGAME_PIECES:
+        if tablebase is None or tablebase.probe_wdl(board) is None:
+            depth = endgame_depth
+    return depth
+
+
+def _score_to_tt(score, ply):
+    """Mate scores are stored counted from the stored position, not from the root."""
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def _score_from_tt(score, ply):
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+
+# 'python': evaluate leaves one by one; 'numpy': score the children of depth-1 nodes in one batch
+EVAL_BACKENDS = ('python', 'numpy')
+
+# Null-move pruning: only at this remaining depth or more, searching the null move this much shallower.
+# The root is searched by _search_root, so both only fire in searches of depth 4 or more
+NULL_MOVE_MIN_DEPTH = 3
+NULL_MOVE_REDUCTION = 2
+# Late-move reductions: quiet moves from this index on are first searched LMR_REDUCTION plies shallower
+LMR_MIN_DEPTH = 3
+LMR_MIN_INDEX = 3
+LMR_REDUCTION = 1
+
+# Score of a tablebase win: above any material score, below a mate
+TABLEBASE_WIN_SCORE = 20000
+
+
+class SearchAborted(Exception):
+    """Raised inside the search when the time or node budget runs out."""
+
 
 class ChessAI:
-    def __init__(self, color):
+    def __init__(self, color, tt_size=1 << 20, tt_replacement='depth',
+                 time_limit=None, node_limit=None, move_orderer=None,
+                 use_alpha_beta=True, endgame_depth=ENDGAME_DEPTH, book_path=None, tablebase_path=None,
+                 eval_backend='python', use_null_move=False, use_lmr=False, use_pvs=True,
+                 aspiration_window=ASPIRATION_WINDOW):
         self.color = color
         self.calculations = 0
         self.cutoffs = 0
+        self.first_move_cutoffs = 0  # Cutoffs caused by the first move searched
+        self.depth_reached = 0
+        self.current_depth = 0
+        self.best_score = None
+
+        # False: plain minimax, every move is searched (no cutoffs)
+        self.use_alpha_beta = use_alpha_beta
+        # Principal variation search: moves after the first get a null window first (needs alpha-beta)
+        self.use_pvs = use_pvs
+        # Iterations after the first search the root in a window this wide around the
+        # previous score, widened when the score falls outside (None = full window)
+        self.aspiration_window = aspiration_window
+        self.aspiration_researches = 0
+        # Selective search (both need alpha-beta): null-move pruning and late-move reductions
+        self.use_null_move = use_null_move
+        self.use_lmr = use_lmr
+        self.null_move_cutoffs = 0
+        self.reductions = 0
+        self.re_searches = 0
+        # Fixed-depth searches use this depth once ten or fewer pieces remain (None = keep the depth).
+        # Only used without tablebases.
+        self.endgame_depth = endgame_depth
+        # Syzygy tablebases: exact results at the root and inside the search (None = search only)
+        self.tablebase = Tablebase(tablebase_path) if tablebase_path else None
+        self.tablebase_hits = 0
+
+        # Polyglot opening book, consulted by choose_move before searching (None = always search)
+        self.book = OpeningBook(book_path) if book_path else None
+
+        # Decides in which order every search node tries its moves
+        self.move_orderer = move_orderer if move_orderer is not None else MoveOrderer()
+        self._root_ply = 0
+
+        # Default budget used by choose_move (None = fixed-depth search)
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self._deadline = None
+        self._max_nodes = None
+        self._stop_event = None
+        self._root_moves = None  # Root moves to choose from (None = all legal moves)
+
+        # Called as on_iteration(depth, best_move, score) after every completed depth
+        self.on_iteration = None
+        # Print the search statistics after every move
+        self.verbose = True
+        # Telemetry sinks (see telemetry.py); each gets a SearchStats after every move
+        self.sinks = []
+        self.last_stats = None
+        self.last_pv = []  # Expected line of the last move found, starting with that move
+        # Set by SearchWorker for ponder searches: holds the statistics back until the move is played
+        self.stats_gate = None
+        self._iterations = None
+        self._cutoff_positions = None
+
+        # Transposition table shared by every search of this AI (tt_size=0 disables it)
+        self.tt = TranspositionTable(tt_size, tt_replacement) if tt_size else None
 
         # Piece-Square Tables (Evaluation Matrices)
         self.pawn_eval_white = [
@@ -86,6 +250,18 @@ class ChessAI:
         
         self.king_eval_black = self._reverse_array(self.king_eval_white)
 
+        # Flat 64-entry tables of signed (piece value + position value),
+        # indexed as score_tables[color][piece_type][square]
+        self.score_tables = self._build_score_tables()
+        if eval_backend not in EVAL_BACKENDS:
+            raise ValueError(f"Unknown evaluation backend: {eval_backend}")
+        self.eval_backend = eval_backend
+        self.batch_evaluator = NumpyEvaluator(self, MATE_SCORE) if eval_backend == 'numpy' else None
+
+        # Running evaluation (this AI's view) kept up to date by _push/_pop during search
+        self._score = 0
+        self._score_stack = []
+
     def _reverse_array(self, array):
         """Reverse the evaluation matrix for black pieces."""
         return array[::-1]
@@ -128,112 +304,588 @@ class ChessAI:
         
         return eval_matrix[row][col]
 
+    def _build_score_tables(self):
+        """Precompute the material + piece-square score of every piece on every square, in centipawns."""
+        tables = {}
+        for color in chess.COLORS:
+            sign = 1 if color == self.color else -1
+            by_type = [None]
+            for piece_type in chess.PIECE_TYPES:
+                by_type.append([
+                    sign * round(CENTIPAWNS_PER_UNIT * (self._get_piece_value(piece_type) +
+                                                        self._get_piece_square_value(piece_type, square, color)))
+                    for square in chess.SQUARES
+                ])
+            tables[color] = by_type
+        return tables
+
+    def _material_score(self, board):
+        """Sum the score tables over every piece on the board."""
+        tables = self.score_tables
+        total_evaluation = 0
+        for square, piece in board.piece_map().items():
+            total_evaluation += tables[piece.color][piece.piece_type][square]
+        return total_evaluation
+
     def evaluate_board(self, board):
-        """Evaluate the current board state."""
+        """Evaluate the current board state for this AI, in centipawns."""
         if board.is_checkmate():
-            return float('-inf') if board.turn == self.color else float('inf')
+            return -MATE_SCORE if board.turn == self.color else MATE_SCORE
         
         if board.is_stalemate() or board.is_insufficient_material():
-            return 0.0
-        
-        total_evaluation = 0.0
-        
-        for square in chess.SQUARES:
-            piece = board.piece_at(square)
-            if piece is not None:
-                # Determine sign based on piece color
-                sign = 1 if piece.color == self.color else -1
-                
-                # Calculate piece value
-                piece_value = self._get_piece_value(piece.piece_type)
-                piece_square_value = self._get_piece_square_value(piece.piece_type, square, piece.color)
-                
-                total_evaluation += sign * (piece_value + piece_square_value)
+            return 0
         
-        return total_evaluation
+        return self._material_score(board)
+
+    def _evaluate_incremental(self, board, ply):
+        """evaluate_board's result for the side to move, using the running score from _push/_pop.
+
+        Looks for a single legal move instead of generating them twice
+        (once for checkmate, once for stalemate). Mates count from the root.
+        """
+        if not any(board.generate_legal_moves()):
+            if board.is_check():
+                return ply - MATE_SCORE
+            return 0  # Stalemate
+
+        if board.is_insufficient_material():
+            return 0
+
+        return self._score if board.turn == self.color else -self._score
+
+    def _game_over_score(self, board, moves, ply):
+        """Score (side to move's view) of an interior node if the game is over there, else None.
+
+        Game over as is_game_over decides. Uses the node's own move list for
+        mate and stalemate. The automatic draws need 150 (seventy-five moves)
+        or at least 16 (five repetitions of four plies) moves without a
+        capture or pawn move, so their slower checks are skipped below that.
+        """
+        if not moves:
+            if board.is_check():
+                return ply - MATE_SCORE
+            return 0  # Stalemate
+        if board.is_insufficient_material():
+            return 0
+        # Seventy-five moves or fivefold repetition: drawn, but scored like any other leaf
+        if board.halfmove_clock >= 150 or (board.halfmove_clock >= 16 and board.is_fivefold_repetition()):
+            return self._score if board.turn == self.color else -self._score
+        return None
+
+    def _move_delta(self, board, move):
+        """Change of the material + position score caused by a move (before it is pushed)."""
+        tables = self.score_tables
+        color = board.turn
+        own = tables[color]
+        piece_type = board.piece_type_at(move.from_square)
+        delta = own[move.promotion or piece_type][move.to_square] - own[piece_type][move.from_square]
+
+        if board.is_castling(move):
+            # The rook jumps over the king as well
+            rank = chess.square_rank(move.from_square)
+            if board.is_kingside_castling(move):
+                rook_from, rook_to = chess.square(7, rank), chess.square(5, rank)
+            else:
+                rook_from, rook_to = chess.square(0, rank), chess.square(3, rank)
+            delta += own[chess.ROOK][rook_to] - own[chess.ROOK][rook_from]
+        elif board.is_en_passant(move):
+            captured_square = chess.square(chess.square_file(move.to_square), chess.square_rank(move.from_square))
+            delta -= tables[not color][chess.PAWN][captured_square]
+        else:
+            captured = board.piece_type_at(move.to_square)
+            if captured:
+                delta -= tables[not color][captured][move.to_square]
+        return delta
+
+    def _push(self, board, move):
+        """Make a move on the board and update the running score."""
+        self._score_stack.append(self._score)
+        self._score += self._move_delta(board, move)
+        board.push(move)
+
+    def _pop(self, board):
+        """Take back the last move and restore the running score."""
+        board.pop()
+        self._score = self._score_stack.pop()
 
-    # def minimax(self, board, depth, maximizing_player):
-    #     """Minimax algorithm."""
-    #     if depth == 0 or board.is_game_over():
-    #         return self.evaluate_board(board)       
-    #     if maximizing_player:
-    #         max_eval = float('-inf')
-    #         for move in board.legal_moves:
-    #             board.push(move)
-    #             eval = self.minimax(board, depth - 1, False)
-    #             board.pop()
-    #             max_eval = max(max_eval, eval)
-    #         return max_eval
-    #     else:
-    #         min_eval = float('inf')
-    #         for move in board.legal_moves:
-    #             board.push(move)
-    #             eval = self.minimax(board, depth - 1, True)
-    #             board.pop()
-    #             min_eval = min(min_eval, eval)
-    #         return min_eval
-
-
-    def minimax(self, board, depth, alpha, beta, maximizing_player):
-        """Minimax algorithm with alpha-beta pruning."""
+    def negamax(self, board, depth, alpha, beta):
+        """Principal variation search; returns the score for the side to move.
+
+        The first move is searched with the full (alpha, beta) window. The
+        others only have to show they are no better than alpha, with a null
+        window (alpha, alpha + 1), and are searched again with the full
+        window when they are. Without use_pvs every move gets the full
+        window, and without use_alpha_beta nothing is cut off (plain minimax).
+        """
         self.calculations += 1  # Count every node evaluated
+        if self._max_nodes is not None and self.calculations >= self._max_nodes:
+            raise SearchAborted()
+        if self.calculations % TIME_CHECK_INTERVAL == 0:
+            if self._deadline is not None and time.perf_counter() >= self._deadline:
+                raise SearchAborted()
+            if self._stop_event is not None and self._stop_event.is_set():
+                raise SearchAborted()
+        ply = len(board.move_stack) - self._root_ply
 
-        if depth == 0 or board.is_game_over():
-            return self.evaluate_board(board)
-
-        if maximizing_player:
-            max_eval = float('-inf')
-            for move in board.legal_moves:
-                board.push(move)
-                eval = self.minimax(board, depth - 1, alpha, beta, False)
-                board.pop()
-                max_eval = max(max_eval, eval)
-                alpha = max(alpha, eval)
-                if beta <= alpha:
-                    self.cutoffs += 1
-                    break  # Beta cut-off
-            return max_eval
+        # Tablebase positions only arise after a capture or pawn move, so probe just those
+        if self.tablebase is not None and board.halfmove_clock == 0 and ply > 0:
+            wdl = self.tablebase.probe_wdl(board)
+            if wdl is not None:
+                self.tablebase_hits += 1
+                return self._tablebase_score(wdl)
+
+        key = None
+        tt_move = None
+        if self.tt is not None:
+            key = position_key(board)
+            entry = self.tt.probe(key)
+            if entry is not None:
+                tt_move = entry[4]
+                if entry[1] >= depth:
+                    score, flag = _score_from_tt(entry[2], ply), entry[3]
+                    if flag == EXACT:
+                        return score
+                    if flag == LOWERBOUND:
+                        alpha = max(alpha, score)
+                    elif flag == UPPERBOUND:
+                        beta = min(beta, score)
+                    if self.use_alpha_beta and beta <= alpha:
+                        return score
+
+        if depth == 0:
+            score = self._evaluate_incremental(board, ply)
+            if key is not None:
+                self.tt.store(key, depth, _score_to_tt(score, ply), EXACT, None)
+            return score
+
+        # The only move generation of this node
+        legal_moves = list(board.legal_moves)
+        score = self._game_over_score(board, legal_moves, ply)
+        if score is not None:
+            if key is not None:
+                self.tt.store(key, depth, _score_to_tt(score, ply), EXACT, None)
+            return score
+
+        in_check = (self.use_null_move or self.use_lmr) and board.is_check()
+        if self.use_null_move and self.use_alpha_beta and depth >= NULL_MOVE_MIN_DEPTH and not in_check:
+            score = self._null_move_search(board, depth, beta, ply)
+            if score is not None:
+                return score
+
+        alpha_start, beta_start = alpha, beta
+        moves = self.move_orderer.order(board, legal_moves, ply, tt_move)
+        # Late quiet moves are unlikely to be best: search them shallower first
+        reduce_late = self.use_lmr and self.use_alpha_beta and depth >= LMR_MIN_DEPTH and not in_check
+        if depth == 1 and self.batch_evaluator is not None and self.tablebase is None:
+            best, best_move = self._search_frontier(board, moves, alpha, beta, ply)
         else:
-            min_eval = float('inf')
-            for move in board.legal_moves:
-                board.push(move)
-                eval = self.minimax(board, depth - 1, alpha, beta, True)
-                board.pop()
-                min_eval = min(min_eval, eval)
-                beta = min(beta, eval)
-                if beta <= alpha:
-                    self.cutoffs += 1
-                    break  # Alpha cut-off
-            return min_eval
-
-    def get_best_move(self, board, depth=3):
-        """Find the best move using minimax with alpha-beta pruning."""
-        if len(board.piece_map()) <= 10:
-            depth = 5
+            best = -math.inf
+            best_move = None
+            for index, move in enumerate(moves):
+                reduce = reduce_late and index >= LMR_MIN_INDEX and not board.is_capture(move) and not move.promotion
+                self._push(board, move)
+                if index == 0 or not self.use_alpha_beta:
+                    score = -self.negamax(board, depth - 1, -beta, -alpha)
+                else:
+                    search_full = True
+                    if reduce and not board.is_check():
+                        # Does the move beat alpha at all? Only then search it to full depth
+                        self.reductions += 1
+                        score = -self.negamax(board, max(0, depth - 1 - LMR_REDUCTION), -alpha - 1, -alpha)
+                        search_full = score > alpha
+                        if search_full:
+                            self.re_searches += 1
+                    # Leaves score the same in any window, so they are never searched twice
+                    if search_full and self.use_pvs and depth > 1:
+                        score = -self.negamax(board, depth - 1, -alpha - 1, -alpha)
+                        search_full = alpha < score < beta
+                    if search_full:
+                        score = -self.negamax(board, depth - 1, -beta, -alpha)
+                self._pop(board)
+                if best_move is None or score > best:
+                    best = score
+                    best_move = move
+                alpha = max(alpha, score)
+                if self.use_alpha_beta and beta <= alpha:
+                    self._record_cutoff(board, move, index, ply, depth)
+                    break  # Beta cut-off
+
+        if key is not None:
+            if best <= alpha_start:
+                flag = UPPERBOUND
+            elif best >= beta_start:
+                flag = LOWERBOUND
+            else:
+                flag = EXACT
+            self.tt.store(key, depth, _score_to_tt(best, ply), flag, best_move)
+        return best
+
+    def _null_move_search(self, board, depth, beta, ply):
+        """Let the side to move pass; if that still fails high, return beta, else None.
+
+        Skipped right after another null move, at the root, when beta is
+        infinite, when the static evaluation is below beta, and when the
+        side to move has only pawns left, where passing could be better
+        than any move (zugzwang).
+        """
+        if ply == 0 or not board.move_stack[-1]:
+            return None
+        if not board.occupied_co[board.turn] & ~(board.pawns | board.kings):
+            return None
+        if beta == math.inf:
+            return None
+        # Static score only: negamax has already ruled out mate, stalemate and dead draws here
+        static = self._score if board.turn == self.color else -self._score
+        if static < beta:
+            return None  # Already below beta: passing would not fail high, the null search is wasted
+
+        self._score_stack.append(self._score)  # Popped by _pop, also when the search is aborted
+        board.push(chess.Move.null())
+        score = -self.negamax(board, max(0, depth - 1 - NULL_MOVE_REDUCTION), -beta, 1 - beta)
+        self._pop(board)
+        if score >= beta:
+            self.null_move_cutoffs += 1
+            return beta  # Not the score itself: a mate found after passing proves nothing
+        return None
+
+    def _search_frontier(self, board, moves, alpha, beta, ply):
+        """Depth-1 node with a batch evaluator: score all children at once, then replay the move loop.
+
+        The replay counts nodes, stops at the same cutoff and picks the same
+        move as searching each child with negamax(depth=0) would. Children
+        are not looked up in or stored to the transposition table.
+        Returns (score, best_move).
+        """
+        evaluator = self.batch_evaluator
+        # The children's static scores are this AI's view; the node wants the mover's
+        sign = 1 if board.turn == self.color else -1
+        scores = evaluator.child_scores(board, self._score, moves)
+        best_move = None
+        best = -math.inf
+        for index, move in enumerate(moves):
+            self.calculations += 1
+            if self._max_nodes is not None and self.calculations >= self._max_nodes:
+                raise SearchAborted()
+            if self.calculations % TIME_CHECK_INTERVAL == 0:
+                if self._deadline is not None and time.perf_counter() >= self._deadline:
+                    raise SearchAborted()
+                if self._stop_event is not None and self._stop_event.is_set():
+                    raise SearchAborted()
+
+            # Game-ending children are only looked for among the moves actually searched
+            score = evaluator.terminal_score(board, move, ply)
+            if score is None:
+                score = sign * scores[index]
+            if best_move is None or score > best:
+                best = score
+                best_move = move
+            alpha = max(alpha, score)
+            if self.use_alpha_beta and beta <= alpha:
+                self._record_cutoff(board, move, index, ply, 1)
+                break
+        return best, best_move
+
+    def _tablebase_score(self, wdl):
+        """Score of a tablebase result for the side to move (wins ruined by the 50-move rule count as draws)."""
+        return TABLEBASE_WIN_SCORE if wdl == 2 else -TABLEBASE_WIN_SCORE if wdl == -2 else 0
+
+    def _record_cutoff(self, board, move, index, ply, depth):
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+        if self._cutoff_positions is not None:
+            self._cutoff_positions[index] = self._cutoff_positions.get(index, 0) + 1
+        self.move_orderer.record_cutoff(board, move, ply, depth)
+
+    def _search_root(self, board, depth, first_move=None, alpha=-math.inf, beta=math.inf):
+        """Search every root move to the given depth within the (alpha, beta) window.
+
+        Returns (best_move, score). A score <= alpha or >= beta is only a
+        bound: the caller widens its aspiration window and searches again.
+        The best move found so far is kept in self._root_best so an aborted
+        iteration can still be used.
+        """
+        alpha_start = alpha
         best_move = None
-        max_eval = float('-inf')
-        alpha = float('-inf')
-        beta = float('inf')
+        best = -math.inf
+
+        key = None
+        tt_move = None
+        if self.tt is not None:
+            key = position_key(board)
+            entry = self.tt.probe(key)
+            if entry is not None:
+                tt_move = entry[4]
+
+        null_window = self.use_pvs and self.use_alpha_beta and depth > 1
+        # The previous iteration's best move is searched before the table move
+        root_moves = self._root_moves or board.legal_moves
+        for index, move in enumerate(self.move_orderer.order(board, root_moves, 0, first_move or tt_move)):
+            self._push(board, move)
+            if board.is_checkmate():
+                self._pop(board)
+                self._root_best = move
+                return move, MATE_SCORE - 1
+            if index == 0 or not null_window:
+                score = -self.negamax(board, depth - 1, -beta, -alpha)
+            else:
+                score = -self.negamax(board, depth - 1, -alpha - 1, -alpha)
+                if alpha < score < beta:
+                    score = -self.negamax(board, depth - 1, -beta, -alpha)
+            self._pop(board)
+            if best_move is None or score > best:
+                best = score
+                best_move = move
+                self._root_best = move
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break  # Fail high
+
+        if key is not None and best_move is not None:
+            if best <= alpha_start:
+                flag = UPPERBOUND
+            elif best >= beta:
+                flag = LOWERBOUND
+            else:
+                flag = EXACT
+            self.tt.store(key, depth, best, flag, best_move)
+        return best_move, best
+
+    def get_best_move(self, board, depth=None, time_limit=None, node_limit=None, stop_event=None,
+                      iterative=None, root_moves=None):
+        """Find the best move using principal variation search (negamax with alpha-beta pruning).
+
+        Without a budget the search runs to a fixed depth (3 by default).
+        With a time limit (seconds) and/or a node limit, the search deepens
+        one ply at a time up to `depth` and returns the best move of the
+        deepest iteration that finished within the budget. iterative=True
+        deepens the same way without a budget.
+        Setting `stop_event` (a threading.Event) from another thread stops
+        the search early; the best move found so far is returned.
+        root_moves limits the choice to these legal moves (UCI 'go searchmoves').
+        """
+        if time_limit is None:
+            time_limit = self.time_limit
+        if node_limit is None:
+            node_limit = self.node_limit
+        budgeted = time_limit is not None or node_limit is not None
+        if iterative is None:
+            iterative = budgeted
+        self._start_search(board)
+
+        if self.tablebase is not None:
+            result = self.tablebase.root_move(board)
+            if result is not None and (not root_moves or result[0] in root_moves):
+                move, wdl = result
+                self.best_score = self._tablebase_score(wdl)
+                self._report(board, move, 'tablebase')
+                return move
+
+        if not iterative:
+            depths = [fixed_depth(board, depth, self.endgame_depth, self.tablebase)]
+        else:
+            depths = range(1, (depth or MAX_DEPTH) + 1)
+
+        self._deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        self._max_nodes = node_limit
+        self._stop_event = stop_event
+        self._root_moves = list(root_moves) if root_moves else None
+        try:
+            best_move = self._iterative_deepening(board, depths)
+        finally:
+            self._deadline = None
+            self._max_nodes = None
+            self._stop_event = None
+            self._root_moves = None
+
+        # A search stopped from outside is thrown away (a ponder miss, a restart): nothing to report
+        if stop_event is None or not stop_event.is_set():
+            self._report(board, best_move, 'search')
+        return best_move
+
+    def _report(self, board, move, source):
+        """Send the statistics of this move to the sinks (nothing is built without sinks)."""
+        # Kept even without sinks, read from the table before another search can overwrite it
+        pv = self.principal_variation(board) if source == 'search' else []
+        if move is None:
+            self.last_pv = []
+        else:
+            self.last_pv = pv if pv[:1] == [move] else [move]
+        sinks = list(self.sinks)
+        if self.verbose:
+            sinks.append(ConsoleSink())
+        if not sinks:
+            self.last_stats = None
+            return
+        stats = SearchStats(board.fen(), board.turn, move, source)
+        stats.score = self.best_score
+        stats.depth = self.depth_reached
+        stats.nodes = self.calculations
+        stats.time = time.perf_counter() - self._search_start
+        for depth, nodes, seconds in self._iterations or []:
+            stats.nodes_per_depth[depth] = nodes
+            stats.time_per_depth[depth] = seconds
+        stats.cutoffs = self.cutoffs
+        stats.first_move_cutoffs = self.first_move_cutoffs
+        stats.cutoff_positions = dict(self._cutoff_positions or {})
+        if self.tt is not None:
+            stats.tt_hits, stats.tt_misses, stats.tt_overwrites = self.tt.hits, self.tt.misses, self.tt.overwrites
+        stats.tablebase_hits = self.tablebase_hits
+        stats.null_move_cutoffs = self.null_move_cutoffs
+        stats.reductions = self.reductions
+        stats.re_searches = self.re_searches
+        stats.aspiration_researches = self.aspiration_researches
+        stats.pv = [pv_move.uci() for pv_move in self.last_pv]
+        publish(self, stats, sinks)
+
+    def _start_search(self, board):
+        """Reset the counters and per-search state before searching from this position."""
         self.calculations = 0
         self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.depth_reached = 0
+        self.current_depth = 0
+        self.best_score = None  # Score of the deepest completed iteration
+        self._root_best = None
+        self._root_ply = len(board.move_stack)
+        # The only full rescan; the search updates the score move by move
+        self._score = self._material_score(board)
+        self._score_stack = []
+        self.move_orderer.new_search()
+        if self.tt is not None:
+            self.tt.reset_stats()
+        self.tablebase_hits = 0
+        self.null_move_cutoffs = 0
+        self.reductions = 0
+        self.re_searches = 0
+        self.aspiration_researches = 0
+        self._search_start = time.perf_counter()
+        # Per-iteration counters are only kept when someone will read them
+        collect = self.verbose or bool(self.sinks)
+        self._iterations = [] if collect else None
+        self._cutoff_positions = {} if collect else None
 
-        for move in board.legal_moves:
-            board.push(move)
-            if board.is_checkmate():
-                board.pop()
-                return move  
-            move_eval = self.minimax(board, depth - 1, alpha, beta, False)
-            board.pop()
-            if best_move is None or move_eval > max_eval:
-                max_eval = move_eval
+    def search_root_move(self, board, move, depth, alpha=-math.inf, stop_event=None, node_limit=None):
+        """Score one root move with a (alpha, inf) window.
+
+        Used to split the root across processes. A returned score <= alpha
+        is only an upper bound. Raises SearchAborted if stop_event is set
+        or the search needs more than node_limit nodes.
+        """
+        self._start_search(board)
+        self._stop_event = stop_event
+        self._max_nodes = node_limit
+        try:
+            self._push(board, move)
+            try:
+                if board.is_checkmate():
+                    return MATE_SCORE - 1
+                return -self.negamax(board, depth - 1, -math.inf, -alpha)
+            finally:
+                # Unwinds the whole line if the search was aborted halfway
+                while len(board.move_stack) > self._root_ply:
+                    self._pop(board)
+        finally:
+            self._stop_event = None
+            self._max_nodes = None
+
+    def _iterative_deepening(self, board, depths):
+        """Search each depth in turn until the last one or until the search is aborted."""
+        root_ply = len(board.move_stack)
+        best_move = None
+        try:
+            for depth in depths:
+                self.current_depth = depth
+                if self._iterations is not None:
+                    iteration_nodes, iteration_start = self.calculations, time.perf_counter()
+                move, score = self._search_aspiration(board, depth, best_move)
+                if move is None:
+                    break  # No legal moves
                 best_move = move
-            alpha = max(alpha, move_eval)
-        print(f"[AI Move] Calculations: {self.calculations}, Cutoffs: {self.cutoffs}, "
-          f"Pruned: {100 * self.cutoffs / self.calculations:.2f}%")
-        
+                self.best_score = score
+                self.depth_reached = depth
+                if self._iterations is not None:
+                    self._iterations.append((depth, self.calculations - iteration_nodes,
+                                             time.perf_counter() - iteration_start))
+                if self.on_iteration is not None:
+                    self.on_iteration(depth, move, score)
+                if score >= MATE_BOUND:
+                    break  # Forced mate found, no need to look deeper
+        except SearchAborted:
+            # Undo the moves the interrupted search left on the board
+            while len(board.move_stack) > root_ply:
+                self._pop(board)
+            if best_move is None:
+                best_move = self._root_best
+
+        if best_move is None:
+            best_move = next(iter(self._root_moves or board.legal_moves), None)
         return best_move
 
+    def _search_aspiration(self, board, depth, first_move):
+        """Search the root in a window around the previous iteration's score.
+
+        A score outside the window is only a bound, so the side it fell out
+        of is widened (doubling each time, fully open past ASPIRATION_MAX)
+        and the root is searched again. Returns (best_move, score).
+        """
+        delta = self.aspiration_window
+        previous = self.best_score
+        if not delta or not self.use_alpha_beta or previous is None or abs(previous) >= MATE_BOUND:
+            return self._search_root(board, depth, first_move)
+
+        alpha, beta = previous - delta, previous + delta
+        while True:
+            move, score = self._search_root(board, depth, first_move, alpha, beta)
+            if move is None or alpha < score < beta:
+                return move, score
+            self.aspiration_researches += 1
+            delta *= 2
+            if score <= alpha:
+                alpha = score - delta if delta <= ASPIRATION_MAX else -math.inf
+            else:
+                beta = score + delta if delta <= ASPIRATION_MAX else math.inf
+                first_move = move  # The move that failed high is tried first
+
+    def progress(self):
+        """Search progress, safe to read from another thread while searching."""
+        return {
+            'depth': self.depth_reached,
+            'current_depth': self.current_depth,
+            'nodes': self.calculations
+        }
+
+    def principal_variation(self, board, max_length=MAX_DEPTH):
+        """Expected line of play from this position, following the best moves in the table."""
+        pv = []
+        if self.tt is None:
+            return pv
+        board = board.copy(stack=False)
+        seen = set()
+        while len(pv) < max_length:
+            key = position_key(board)
+            entry = self.tt.probe(key)
+            # Stop at unknown positions and at repetitions, which would loop forever
+            if entry is None or entry[4] is None or key in seen or not board.is_legal(entry[4]):
+                break
+            seen.add(key)
+            pv.append(entry[4])
+            board.push(entry[4])
+        return pv
+
+    def reset(self):
+        """Forget everything learned during the previous game."""
+        if self.tt is not None:
+            self.tt.clear()
+        self.move_orderer.reset()
+
 
-    def choose_move(self, board):
-        """Choose a move for the AI."""
-        return self.get_best_move(board)
+    def choose_move(self, board, stop_event=None):
+        """Choose a move for the AI: from the opening book if possible, otherwise by search."""
+        if self.book is not None:
+            move = self.book.choose(board)
+            if move is not None:
+                self._start_search(board)
+                self._report(board, move, 'book')
+                return move
+        return self.get_best_move(board, stop_event=stop_event)
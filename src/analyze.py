@@ -0,0 +1,207 @@
+"""Batch analysis of EPD/FEN files on a pool of worker processes.
+
+    python src/analyze.py positions.epd results.jsonl --depth 4 --workers 16
+    python src/analyze.py positions.epd results.jsonl --depth 4 --resume
+
+Reads the input one line at a time and writes one JSON line per position,
+in input order, as results come in. Only a bounded number of positions is
+in flight at once, so memory does not grow with the input size. Progress
+is checkpointed next to the output file; --resume continues from it.
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import chess
+
+from ai import ChessAI, mate_distance, score_to_centipawns
+
+# Worker state: one warm AI per color, kept between positions
+_engines = {}
+_search_options = {}
+
+
+def _init_worker(options):
+    _search_options.update(options)
+
+
+def _engine_for(color):
+    if color not in _engines:
+        ai = ChessAI(color)
+        ai.verbose = False
+        _engines[color] = ai
+    return _engines[color]
+
+
+def parse_position(line):
+    """Return (board, operations) for a FEN or EPD line."""
+    fields = line.split()
+    if len(fields) >= 6 and fields[4].isdigit() and fields[5].isdigit():
+        return chess.Board(' '.join(fields[:6])), {}
+    board = chess.Board()
+    operations = board.set_epd(line)
+    return board, operations
+
+
+def analyse_line(line_number, line):
+    """Pool task: search one position and describe the result."""
+    record = {'line': line_number, 'input': line}
+    try:
+        board, operations = parse_position(line)
+    except ValueError as error:
+        record['error'] = str(error)
+        return record
+    if 'id' in operations:
+        record['id'] = operations['id']
+
+    ai = _engine_for(board.turn)
+    start = time.perf_counter()
+    move = ai.get_best_move(board, depth=_search_options['depth'],
+                            time_limit=_search_options['time_limit'],
+                            node_limit=_search_options['node_limit'],
+                            iterative=True)
+    elapsed = time.perf_counter() - start
+
+    record['bestmove'] = move.uci() if move else None
+    record['san'] = board.san(move) if move else None
+    record['score_cp'] = score_to_centipawns(ai.best_score) if ai.best_score is not None else None
+    record['mate'] = mate_distance(ai.best_score) if ai.best_score is not None else None
+    record['depth'] = ai.depth_reached
+    record['nodes'] = ai.calculations
+    record['time'] = round(elapsed, 4)
+    return record
+
+
+class Checkpoint:
+    """Number of input lines done and the output size at that point."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return 0, 0
+        with open(self.path) as f:
+            data = json.load(f)
+        return data['lines_done'], data['output_bytes']
+
+    def save(self, lines_done, output_bytes):
+        # Write-then-rename, so an interrupted save never leaves a broken checkpoint
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'lines_done': lines_done, 'output_bytes': output_bytes}, f)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _positions(input_file, skip):
+    """Yield (line_number, line) for every position line, skipping blank lines and comments."""
+    for line_number, line in enumerate(input_file, start=1):
+        if line_number <= skip:
+            continue
+        line = line.strip()
+        if not line or line.startswith('#'):
+            yield line_number, None
+        else:
+            yield line_number, line
+
+
+def analyse_file(input_path, output_path, depth=None, time_limit=None, node_limit=None,
+                 workers=None, max_pending=None, resume=False, checkpoint_every=1.0):
+    """Analyse every position of input_path into output_path (JSON lines)."""
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 4
+    checkpoint = Checkpoint(output_path + '.ckpt')
+
+    lines_done, output_bytes = checkpoint.load() if resume else (0, 0)
+    if resume and os.path.exists(output_path):
+        output = open(output_path, 'r+')
+        # Drop results written after the last checkpoint; they are computed again
+        output.truncate(output_bytes)
+        output.seek(output_bytes)
+    else:
+        lines_done, output_bytes = 0, 0
+        output = open(output_path, 'w')
+
+    options = {'depth': depth, 'time_limit': time_limit, 'node_limit': node_limit}
+    pending = {}      # future -> line number
+    finished = {}     # line number -> record (or None for skipped lines), waiting for earlier lines
+    next_line = lines_done + 1
+    last_save = time.monotonic()
+    written = 0
+
+    with open(input_path) as input_file, output, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(options,)) as pool:
+        positions = _positions(input_file, lines_done)
+        try:
+            while True:
+                # Keep at most max_pending lines between the next line to write and the newest submitted
+                for line_number, line in itertools.islice(positions, max(0, max_pending - len(pending) - len(finished))):
+                    if line is None:
+                        finished[line_number] = None
+                    else:
+                        pending[pool.submit(analyse_line, line_number, line)] = line_number
+                if not pending and not finished:
+                    break
+
+                if pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        finished[pending.pop(future)] = future.result()
+
+                # Write everything that is now contiguous with what was written before
+                while next_line in finished:
+                    record = finished.pop(next_line)
+                    if record is not None:
+                        output.write(json.dumps(record) + '\n')
+                        written += 1
+                    next_line += 1
+
+                if time.monotonic() - last_save >= checkpoint_every:
+                    output.flush()
+                    checkpoint.save(next_line - 1, output.tell())
+                    last_save = time.monotonic()
+        except KeyboardInterrupt:
+            output.flush()
+            checkpoint.save(next_line - 1, output.tell())
+            for future in pending:
+                future.cancel()
+            raise
+
+    checkpoint.remove()
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse an EPD/FEN file with a pool of ChessAI workers")
+    parser.add_argument('input', help="EPD or FEN file, one position per line")
+    parser.add_argument('output', help="JSON lines file with one result per position")
+    parser.add_argument('--depth', type=int, default=3, help="maximum search depth (default 3)")
+    parser.add_argument('--movetime', type=float, help="seconds per position")
+    parser.add_argument('--nodes', type=int, help="nodes per position")
+    parser.add_argument('--workers', type=int, help="worker processes (default: all cores)")
+    parser.add_argument('--max-pending', type=int, help="positions in flight (default: 4 per worker)")
+    parser.add_argument('--resume', action='store_true', help="continue from the last checkpoint")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        count = analyse_file(args.input, args.output, depth=args.depth, time_limit=args.movetime,
+                             node_limit=args.nodes, workers=args.workers, max_pending=args.max_pending,
+                             resume=args.resume)
+    except KeyboardInterrupt:
+        print("Interrupted; run again with --resume to continue.", file=sys.stderr)
+        return 130
+    print(f"Analysed {count} positions in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
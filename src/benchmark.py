@@ -0,0 +1,316 @@
+"""Headless benchmarks for move generation and search (no pygame needed).
+
+    python src/benchmark.py perft
+    python src/benchmark.py search --depth 3
+    python src/benchmark.py run --output results.json --baseline benchmarks/baseline.json
+    python src/benchmark.py parallel --workers 1 2 4 8
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import chess
+
+from ai import ChessAI
+from move_ordering import NoMoveOrdering
+from parallel_search import ParallelSearch
+
+# Fixed benchmark positions: opening, middlegames and endgames
+BENCH_FENS = [
+    chess.STARTING_FEN,
+    "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "r1bq1rk1/pp2ppbp/2np1np1/8/3NP3/2N1BP2/PPPQ2PP/R3KB1R b KQ - 3 9",
+    "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+]
+
+# Standard perft positions with their known node counts per depth
+PERFT_POSITIONS = [
+    ("startpos", chess.STARTING_FEN, [20, 400, 8902, 197281]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603]),
+    ("position3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238]),
+    ("position4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333]),
+    ("position5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379, 2103487]),
+]
+
+# Search settings compared by the search benchmark
+SEARCH_CONFIGS = {
+    'alphabeta': lambda: {},
+    # Alpha-beta with every move searched in the full window (no principal variation search)
+    'fullwindow': lambda: {'use_pvs': False},
+    # The plain minimax: no pruning, no transposition table, generator order
+    'minimax': lambda: {'use_alpha_beta': False, 'tt_size': 0, 'move_orderer': NoMoveOrdering()},
+    # Alpha-beta with the children of depth-1 nodes scored in one NumPy batch (needs numpy)
+    'numpy': lambda: {'eval_backend': 'numpy'},
+    # Selective search: null-move pruning and late-move reductions, alone and together
+    'nullmove': lambda: {'use_null_move': True},
+    'lmr': lambda: {'use_lmr': True},
+    'selective': lambda: {'use_null_move': True, 'use_lmr': True},
+}
+# Null-move pruning and LMR only work at inner nodes of depth 3 or more, which a depth-3
+# search never reaches; run measures them at --selective-depth next to alphabeta instead
+SELECTIVE_CONFIGS = ('nullmove', 'lmr', 'selective')
+
+
+def _quiet():
+    """Silence the per-move prints of the AI while benchmarking."""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def _run_searches(make_engine, fens, depth):
+    """Search every FEN with a fresh engine for the side to move."""
+    wall = 0.0
+    nodes = 0
+    moves = []
+    for fen in fens:
+        board = chess.Board(fen)
+        engine = make_engine(board.turn)
+        try:
+            start = time.perf_counter()
+            with _quiet():
+                move = engine.get_best_move(board, depth)
+            wall += time.perf_counter() - start
+            nodes += engine.calculations
+            moves.append(move.uci() if move else None)
+        finally:
+            if hasattr(engine, 'close'):
+                engine.close()
+    return {'wall': wall, 'nodes': nodes, 'moves': moves}
+
+
+def perft(board, depth):
+    """Count the leaf nodes of the legal move tree."""
+    if depth == 1:
+        return board.legal_moves.count()
+    nodes = 0
+    for move in board.legal_moves:
+        board.push(move)
+        nodes += perft(board, depth - 1)
+        board.pop()
+    return nodes
+
+
+def bench_perft(depth):
+    rows = []
+    for name, fen, expected in PERFT_POSITIONS:
+        board = chess.Board(fen)
+        start = time.perf_counter()
+        nodes = perft(board, depth)
+        wall = time.perf_counter() - start
+        rows.append({
+            'name': name,
+            'fen': fen,
+            'depth': depth,
+            'nodes': nodes,
+            'expected': expected[depth - 1] if depth <= len(expected) else None,
+            'time': wall,
+            'nps': nodes / wall if wall else 0.0
+        })
+    return rows
+
+
+def _search_once(config, fen, depth):
+    board = chess.Board(fen)
+    # endgame_depth=None: benchmark exactly the requested depth
+    return ChessAI(board.turn, endgame_depth=None, **SEARCH_CONFIGS[config]()), board
+
+
+def bench_search(fens, depth, configs):
+    """Fixed-depth search of every FEN with every configuration."""
+    rows = []
+    for config in configs:
+        for fen in fens:
+            ai, board = _search_once(config, fen, depth)
+            start = time.perf_counter()
+            with _quiet():
+                move = ai.get_best_move(board, depth)
+            wall = time.perf_counter() - start
+
+            # Second, untimed run for memory: tracemalloc slows the search down
+            ai, board = _search_once(config, fen, depth)
+            tracemalloc.start()
+            with _quiet():
+                ai.get_best_move(board, depth)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            rows.append({
+                'config': config,
+                'fen': fen,
+                'depth': depth,
+                'move': move.uci() if move else None,
+                'nodes': ai.calculations,
+                'cutoffs': ai.cutoffs,
+                'cutoff_ratio': ai.cutoffs / ai.calculations if ai.calculations else 0.0,
+                'time': wall,
+                'nps': ai.calculations / wall if wall else 0.0,
+                'peak_kb': peak / 1024
+            })
+    return rows
+
+
+def print_perft(rows):
+    print(f"{'position':<10} {'depth':>5} {'nodes':>10} {'time (s)':>9} {'nps':>10}  check")
+    for row in rows:
+        if row['expected'] is None:
+            check = '?'
+        else:
+            check = 'ok' if row['nodes'] == row['expected'] else f"FAIL (expected {row['expected']})"
+        print(f"{row['name']:<10} {row['depth']:>5} {row['nodes']:>10} {row['time']:>9.2f} "
+              f"{row['nps']:>10.0f}  {check}")
+
+
+def print_search(rows):
+    print(f"{'config':<10} {'depth':>5} {'nodes':>9} {'cutoffs':>8} {'time (s)':>9} {'nps':>8} "
+          f"{'peak KB':>9}  move  fen")
+    for row in rows:
+        print(f"{row['config']:<10} {row['depth']:>5} {row['nodes']:>9} {100 * row['cutoff_ratio']:>7.1f}% "
+              f"{row['time']:>9.2f} {row['nps']:>8.0f} {row['peak_kb']:>9.0f}  {row['move']}  {row['fen']}")
+
+
+def compare_to_baseline(results, baseline, max_node_increase, max_nps_drop):
+    """Return a list of regression messages (empty if everything is within the thresholds)."""
+    problems = []
+    for row in results.get('perft', []):
+        if row['expected'] is not None and row['nodes'] != row['expected']:
+            problems.append(f"perft {row['name']} depth {row['depth']}: {row['nodes']} nodes, "
+                            f"expected {row['expected']}")
+
+    old_rows = {(row['config'], row['fen'], row['depth']): row for row in baseline.get('search', [])}
+    totals = {}
+    for row in results.get('search', []):
+        old = old_rows.get((row['config'], row['fen'], row['depth']))
+        if old is None:
+            continue
+        if row['nodes'] > old['nodes'] * (1 + max_node_increase):
+            problems.append(f"{row['config']} depth {row['depth']} {row['fen']}: "
+                            f"{row['nodes']} nodes (baseline {old['nodes']})")
+        total = totals.setdefault(row['config'], [0, 0.0, 0, 0.0])
+        total[0] += row['nodes']
+        total[1] += row['time']
+        total[2] += old['nodes']
+        total[3] += old['time']
+
+    # Speed is compared per configuration over all positions, single timings are too noisy
+    for config, (nodes, wall, old_nodes, old_wall) in totals.items():
+        nps = nodes / wall if wall else 0.0
+        old_nps = old_nodes / old_wall if old_wall else 0.0
+        if old_nps and nps < old_nps * (1 - max_nps_drop):
+            problems.append(f"{config}: {nps:.0f} nodes/s (baseline {old_nps:.0f})")
+    return problems
+
+
+def bench_parallel(fens, depth, worker_counts):
+    """Time the same searches serially and with each worker count.
+
+    Process start-up is not included in the timings: the pool is started
+    before the clock runs, the same way the game keeps one pool alive.
+    """
+    rows = [dict(_run_searches(lambda color: ChessAI(color), fens, depth), workers=0)]
+    for workers in worker_counts:
+        def make_engine(color):
+            search = ParallelSearch(color, workers=workers)
+            # Warm the pool up so process start-up is not timed
+            with _quiet():
+                search.get_best_move(chess.Board(), 1)
+            return search
+        rows.append(dict(_run_searches(make_engine, fens, depth), workers=workers))
+    return rows
+
+
+def print_parallel(rows):
+    serial = rows[0]['wall']
+    print(f"{'workers':>8} {'wall (s)':>10} {'speedup':>8} {'nodes':>10}  moves")
+    for row in rows:
+        label = 'serial' if row['workers'] == 0 else str(row['workers'])
+        print(f"{label:>8} {row['wall']:>10.2f} {serial / row['wall']:>8.2f} {row['nodes']:>10}  "
+              f"{' '.join(str(move) for move in row['moves'])}")
+    cores = os.cpu_count() or 1
+    if any(row['workers'] > cores for row in rows):
+        # More workers than cores only share the same cores: no speedup to measure
+        print(f"Only {cores} CPU core(s): worker counts above {cores} cannot be faster than serial")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless chess AI benchmarks")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    perft_parser = commands.add_parser('perft', help="move generation node counts and speed")
+    perft_parser.add_argument('--depth', type=int, default=3)
+
+    search_parser = commands.add_parser('search', help="fixed-depth search of the benchmark positions")
+    search_parser.add_argument('--depth', type=int, default=3)
+    search_parser.add_argument('--config', nargs='+', choices=sorted(SEARCH_CONFIGS), default=list(SEARCH_CONFIGS))
+
+    run = commands.add_parser('run', help="perft + search, with JSON output and baseline comparison")
+    run.add_argument('--depth', type=int, default=3)
+    run.add_argument('--perft-depth', type=int, default=3)
+    run.add_argument('--selective-depth', type=int, default=4,
+                     help="depth of the nullmove/lmr/selective searches and their alphabeta reference (default 4)")
+    run.add_argument('--config', nargs='+', choices=sorted(SEARCH_CONFIGS), default=list(SEARCH_CONFIGS))
+    run.add_argument('--output', help="write the results to this JSON file")
+    run.add_argument('--baseline', help="compare against this JSON file and fail on regressions")
+    run.add_argument('--max-node-increase', type=float, default=0.05,
+                     help="allowed relative increase of nodes per position (default 0.05)")
+    run.add_argument('--max-nps-drop', type=float, default=0.30,
+                     help="allowed relative drop of nodes per second per config (default 0.30)")
+
+    parallel = commands.add_parser('parallel', help="wall-clock speedup versus worker count")
+    parallel.add_argument('--depth', type=int, default=4)
+    parallel.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+
+    args = parser.parse_args(argv)
+    if args.command == 'perft':
+        print_perft(bench_perft(args.depth))
+    elif args.command == 'search':
+        print_search(bench_search(BENCH_FENS, args.depth, args.config))
+    elif args.command == 'run':
+        results = {
+            'meta': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'depth': args.depth,
+                'perft_depth': args.perft_depth,
+                'selective_depth': args.selective_depth,
+                'time': time.strftime('%Y-%m-%d %H:%M:%S')
+            },
+            'perft': bench_perft(args.perft_depth),
+            'search': bench_search(BENCH_FENS, args.depth,
+                                   [config for config in args.config if config not in SELECTIVE_CONFIGS])
+        }
+        selective = [config for config in args.config if config in SELECTIVE_CONFIGS]
+        if selective:
+            results['search'] += bench_search(BENCH_FENS, args.selective_depth, ['alphabeta'] + selective)
+        print_perft(results['perft'])
+        print()
+        print_search(results['search'])
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+        if args.baseline:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+            problems = compare_to_baseline(results, baseline, args.max_node_increase, args.max_nps_drop)
+            print()
+            if problems:
+                print("Regressions against baseline:")
+                for problem in problems:
+                    print(f"  {problem}")
+                return 1
+            print("No regressions against baseline.")
+    elif args.command == 'parallel':
+        print_parallel(bench_parallel(BENCH_FENS, args.depth, args.workers))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,54 +1,79 @@
 import chess
 
+# Trạng thái suy ra từ vị trí hiện tại (nước đi, chiếu, kết thúc ván), chỉ tính một lần
+class PositionState:
+
+    def __init__(self, board):
+        # Nước đi hợp lệ, nhóm theo ô xuất phát
+        self.moves_by_square = {}
+        for move in board.legal_moves:
+            self.moves_by_square.setdefault(move.from_square, []).append(move)
+        self.is_check = board.is_check()
+
+        if not self.moves_by_square:
+            self.status = 'checkmate' if self.is_check else 'stalemate'
+        elif board.is_insufficient_material():
+            self.status = 'insufficient_material'
+        elif board.is_seventyfive_moves():
+            self.status = 'seventyfive_moves'
+        elif board.is_fivefold_repetition():
+            self.status = 'fivefold_repetition'
+        else:
+            self.status = 'ongoing'
+
+
 class Board:
     def __init__(self):
         self.board = chess.Board()
+        # Cache cho vị trí hiện tại; chỉ bị xoá khi push/pop/reset.
+        # Mọi nước đi phải đi qua các hàm của Board, không gọi self.board.push trực tiếp.
+        self._state = None
+
+    def state(self):
+        if self._state is None:
+            self._state = PositionState(self.board)
+        return self._state
 
     def get_legal_moves(self):
         # Trả về danh sách nước đi hợp lệ (UCI format)
-        return list(self.board.legal_moves)
+        return [move for moves in self.state().moves_by_square.values() for move in moves]
+
+    def moves_from(self, square):
+        # Nước đi hợp lệ xuất phát từ một ô
+        return self.state().moves_by_square.get(square, [])
 
     def push_move(self, move_uci):
         # Nhận nước đi dạng UCI (vd: 'e2e4') và thực hiện
         from_sq = chess.parse_square(move_uci[0:2])
         to_sq = chess.parse_square(move_uci[2:4])
-        piece = self.board.piece_at(from_sq)
-        
-        # Kiểm tra trường hợp tốt di chuyển đến hàng cuối (phong cấp)
-        is_promotion = False
-        if piece and piece.piece_type == chess.PAWN:
-            # Tốt trắng đến hàng 8
-            if piece.color == chess.WHITE and chess.square_rank(to_sq) == 7:
-                is_promotion = True
-            # Tốt đen đến hàng 1
-            elif piece.color == chess.BLACK and chess.square_rank(to_sq) == 0:
-                is_promotion = True
-        
-        if is_promotion:
-            # Tự động phong hậu
-            move = chess.Move(from_sq, to_sq, promotion=chess.QUEEN)
-        else:
-            move = chess.Move(from_sq, to_sq)
-            
-        if move in self.board.legal_moves:
-            self.board.push(move)
-            return True
+
+        # Tốt đến hàng cuối có 4 nước phong cấp: tự động phong hậu
+        for move in self.moves_from(from_sq):
+            if move.to_square == to_sq and move.promotion in (None, chess.QUEEN):
+                self.push(move)
+                return True
         return False
 
+    def push(self, move):
+        # Thực hiện một nước đi hợp lệ (chess.Move), ví dụ nước đi của AI
+        self.board.push(move)
+        self._state = None
+
     def is_check(self):
-        return self.board.is_check()
+        return self.state().is_check
 
     def is_checkmate(self):
-        return self.board.is_checkmate()
+        return self.state().status == 'checkmate'
 
     def is_stalemate(self):
-        return self.board.is_stalemate()
+        return self.state().status == 'stalemate'
 
     def fen(self):
         return self.board.fen()
 
     def reset(self):
         self.board.reset()
+        self._state = None
 
     def turn(self):
         return self.board.turn  # True if white, False if black
@@ -57,15 +82,16 @@ class Board:
         return self.board.result()
 
     def is_game_over(self):
-        return self.board.is_game_over()
+        return self.state().status != 'ongoing'
 
     def legal_moves_squares(self):
         # Trả về danh sách nước đi hợp lệ dạng (from_square, to_square)
-        return [(move.from_square, move.to_square) for move in self.board.legal_moves]
+        return [(move.from_square, move.to_square) for move in self.get_legal_moves()]
 
     def get_piece_at(self, square):
         # Lấy quân cờ tại ô (0-63)
         return self.board.piece_at(square)
 
     def pop(self):
+        self._state = None
         return self.board.pop()
\ No newline at end of file
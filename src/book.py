@@ -0,0 +1,129 @@
+"""Polyglot opening books: lookup for the AI and a builder for PGN files.
+
+    python src/book.py build games.pgn more_games.pgn --output book.bin --max-ply 20
+    python src/book.py build games.cgr --output book.bin
+
+The reader memory-maps the .bin file, so opening even a large book is
+instant and only the pages that are probed are read from disk.
+"""
+import argparse
+import random
+import struct
+import sys
+from collections import defaultdict
+
+import chess
+import chess.pgn
+import chess.polyglot
+
+from records import GameReader
+
+# One Polyglot entry: key, move, weight, learn (big-endian)
+ENTRY_STRUCT = struct.Struct('>QHHI')
+
+
+class OpeningBook:
+    """Weighted move lookup in a Polyglot book."""
+
+    def __init__(self, path, rng=None):
+        self.path = path
+        self.reader = chess.polyglot.open_reader(path)
+        self.rng = rng or random.Random()
+        self.hits = 0
+        self.misses = 0
+
+    def choose(self, board):
+        """Return a book move for the position (chance by weight), or None when out of book."""
+        try:
+            entry = self.reader.weighted_choice(board, random=self.rng)
+        except IndexError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry.move
+
+    def close(self):
+        self.reader.close()
+
+
+def encode_move(board, move):
+    """Polyglot move bits; castling is stored as king takes own rook."""
+    to_square = move.to_square
+    if board.is_castling(move):
+        rook_file = 7 if chess.square_file(move.to_square) > chess.square_file(move.from_square) else 0
+        to_square = chess.square(rook_file, chess.square_rank(move.from_square))
+    promotion = move.promotion - 1 if move.promotion else 0
+    return (promotion << 12) | (move.from_square << 6) | to_square
+
+
+def _read_games(path):
+    """Yield (start board, moves) of every game in a PGN or game records (.cgr) file."""
+    if path.endswith('.cgr'):
+        with GameReader(path) as reader:
+            for record in reader:
+                yield record.board(), record.moves
+        return
+    with open(path, encoding='utf-8', errors='replace') as f:
+        while True:
+            game = chess.pgn.read_game(f)
+            if game is None:
+                break
+            yield game.board(), game.mainline_moves()
+
+
+def build_book(pgn_paths, output_path, max_ply=20, min_count=1):
+    """Write a Polyglot book of the moves played in the first max_ply plies of the games.
+
+    The inputs are PGN or game records files. The weight of a move is the
+    number of games that played it (at most 65535). Returns the number of
+    entries written.
+    """
+    counts = defaultdict(lambda: defaultdict(int))  # key -> raw move -> count
+    for path in pgn_paths:
+        for board, moves in _read_games(path):
+            for ply, move in enumerate(moves):
+                if ply >= max_ply:
+                    break
+                counts[chess.polyglot.zobrist_hash(board)][encode_move(board, move)] += 1
+                board.push(move)
+
+    entries = 0
+    with open(output_path, 'wb') as out:
+        # Readers binary-search the file, so entries must be sorted by key
+        for key in sorted(counts):
+            moves = sorted(counts[key].items(), key=lambda item: -item[1])
+            for raw_move, count in moves:
+                if count >= min_count:
+                    out.write(ENTRY_STRUCT.pack(key, raw_move, min(count, 0xFFFF), 0))
+                    entries += 1
+    return entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Polyglot opening book tools")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="build a Polyglot .bin book from PGN or game records files")
+    build.add_argument('pgn', nargs='+', help="PGN or game records (.cgr) files")
+    build.add_argument('--output', required=True, help="book file to write")
+    build.add_argument('--max-ply', type=int, default=20, help="only use the first plies of each game (default 20)")
+    build.add_argument('--min-count', type=int, default=1, help="drop moves played fewer times (default 1)")
+
+    probe = commands.add_parser('probe', help="list the book moves of a position")
+    probe.add_argument('book', help="Polyglot .bin book")
+    probe.add_argument('--fen', default=chess.STARTING_FEN)
+
+    args = parser.parse_args(argv)
+    if args.command == 'build':
+        entries = build_book(args.pgn, args.output, args.max_ply, args.min_count)
+        print(f"Wrote {entries} entries to {args.output}")
+    elif args.command == 'probe':
+        board = chess.Board(args.fen)
+        with chess.polyglot.open_reader(args.book) as reader:
+            for entry in reader.find_all(board):
+                print(f"{board.san(entry.move):<8} {entry.weight:>6}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,10 +3,12 @@ import chess
 from board import Board
 from config import Config
 from ai import ChessAI
+from sprites import SpriteCache
+from layers import FontCache, BoardLayer
 import os
 
 class Game:
-    def __init__(self, ai_enabled=False):
+    def __init__(self, ai_enabled=False, ai_workers=1, book_path=None, service=None):
         pygame.mixer.init()  # Initialize sound mixer
         
         # Load sound effects
@@ -16,46 +18,93 @@ class Game:
         
         self.board = Board()
         self.config = Config()
+        # Piece images, decoded once and scaled to the 80px squares
+        self.sprites = SpriteCache(piece_set='80px', size=80)
+        # Fonts, text and the static board rendered once and reused every frame
+        self.fonts = FontCache()
+        self.board_layer = BoardLayer(self.fonts, size=80)
         self.selected_square = None
         self.legal_moves = self.board.get_legal_moves()
         self.ai_enabled = ai_enabled
-        self.ai = ChessAI(chess.BLACK) if ai_enabled else None
+        self.book_path = book_path
+        self.service = service
+        if not ai_enabled:
+            self.ai = None
+        elif service:
+            # The AI runs in an engine service (see service.py); this game is one of its sessions
+            from service import RemoteAI
+            self.ai = RemoteAI(chess.BLACK, service)
+        elif ai_workers > 1:
+            # Imported here so single-core games never start a process pool
+            from parallel_search import ParallelSearch
+            self.ai = ParallelSearch(chess.BLACK, workers=ai_workers, book_path=book_path)
+        else:
+            self.ai = ChessAI(chess.BLACK, book_path=book_path)
         self.ai_turn = False
 
     def show_bg(self, surface):
+        # Squares and coordinates come from the cached layer of the current theme
+        surface.blit(self.board_layer.get(self.config.theme, surface.get_size()), (0, 0))
+
+        # Highlight last moved squares
+        last_move = getattr(self, 'last_move', None)
+        if last_move:
+            for square in last_move.get('squares', []):
+                # Use consistent highlight color for all moves
+                pygame.draw.rect(surface, (200, 230, 100), self.square_rect(square))  # Light yellow-green
+
+    def square_rect(self, square):
+        """Screen rectangle of a square (0-63)."""
+        row = 7 - (square // 8)
+        col = square % 8
+        return pygame.Rect(col * 80, row * 80, 80, 80)
+
+    def square_states(self, from_square=None):
+        """Describe how each of the 64 squares should look.
+
+        Each entry is (background color, piece, capture highlight, move dot),
+        so two frames can be compared square by square to find what changed.
+        """
         theme = self.config.theme
         last_move = getattr(self, 'last_move', None)
-        
-        for row in range(8):
-            for col in range(8):
-                # Default color
+        highlighted = last_move.get('squares', []) if last_move else []
+        targets = set()
+        if from_square is not None:
+            targets = {move.to_square for move in self.board.moves_from(from_square)}
+        turn = self.board.board.turn
+
+        states = []
+        for square in chess.SQUARES:
+            row = 7 - (square // 8)
+            col = square % 8
+            if square in highlighted:
+                color = (200, 230, 100)  # Light yellow-green
+            else:
                 color = theme.bg.light if (row + col) % 2 == 0 else theme.bg.dark
-                
-                # Highlight last moved squares
-                current_square = (7 - row) * 8 + col
-                if last_move and current_square in last_move.get('squares', []):
-                    # Use consistent highlight color for all moves
-                    color = (200, 230, 100)  # Light yellow-green
-                
-                rect = (col * 80, row * 80, 80, 80)
-                pygame.draw.rect(surface, color, rect)
-        
-        # Render coordinate notation
-        font = pygame.font.Font(None, 24)
-        
-        # Column letters (A-H)
-        for col in range(8):
-            letter = chr(ord('A') + col)
-            text = font.render(letter, True, (0, 0, 0))
-            text_rect = text.get_rect(center=(col * 80 + 40, 8 * 80 + 40))
-            surface.blit(text, text_rect)
-        
-        # Row numbers (1-8)
-        for row in range(8):
-            number = str(8 - row)
-            text = font.render(number, True, (0, 0, 0))
-            text_rect = text.get_rect(center=(8 * 80 + 40, row * 80 + 40))
-            surface.blit(text, text_rect)
+            piece = self.board.get_piece_at(square)
+            is_target = square in targets
+            capture = is_target and piece is not None and piece.color != turn
+            states.append((color, piece, capture, is_target))
+        return states
+
+    def show_square(self, surface, square, state):
+        """Draw one square with the same layers as a full frame."""
+        color, piece, capture, dot = state
+        rect = self.square_rect(square)
+        row, col = rect.y // 80, rect.x // 80
+        theme = self.config.theme
+        if color == (theme.bg.light if (row + col) % 2 == 0 else theme.bg.dark):
+            # Plain square: copy it from the cached board layer
+            surface.blit(self.board_layer.get(theme, surface.get_size()), rect, rect)
+        else:
+            pygame.draw.rect(surface, color, rect)
+        if capture:
+            pygame.draw.rect(surface, (255, 150, 150), rect)
+        if piece:
+            img = self.sprites.get(piece)
+            surface.blit(img, img.get_rect(center=rect.center))
+        if dot:
+            pygame.draw.circle(surface, (255, 255, 0), rect.center, 15)
 
     def show_pieces(self, surface):
         for square in chess.SQUARES:
@@ -63,49 +112,37 @@ class Game:
             if piece:
                 row = 7 - (square // 8)
                 col = square % 8
-                piece_symbol = piece.symbol().lower()
-                piece_name = {
-                    'r': 'rook',
-                    'n': 'knight',
-                    'b': 'bishop',
-                    'q': 'queen',
-                    'k': 'king',
-                    'p': 'pawn'
-                }[piece_symbol]
-                img_path = f'assets/images/imgs-80px/{"white" if piece.color else "black"}_{piece_name}.png'
-                img = pygame.image.load(img_path)
+                img = self.sprites.get(piece)
                 img_center = col * 80 + 40, row * 80 + 40
                 img_rect = img.get_rect(center=img_center)
                 surface.blit(img, img_rect)
 
     def show_captures(self, surface, from_square):
         """Draw red squares for pieces that can be captured"""
-        for move in self.board.board.legal_moves:
-            if move.from_square == from_square:
-                to_square = move.to_square
-                row = 7 - (to_square // 8)
-                col = to_square % 8
-                
-                # Check if there is an opponent's piece at the destination square
-                target_piece = self.board.get_piece_at(to_square)
-                
-                # If there is an opponent's piece, fill the entire square with red
-                if target_piece is not None and target_piece.color != self.board.board.turn:
-                    rect = pygame.Rect(col * 80, row * 80, 80, 80)
-                    pygame.draw.rect(surface, (255, 150, 150), rect)  # Fill the entire square with light red
+        for move in self.board.moves_from(from_square):
+            to_square = move.to_square
+            row = 7 - (to_square // 8)
+            col = to_square % 8
+            
+            # Check if there is an opponent's piece at the destination square
+            target_piece = self.board.get_piece_at(to_square)
+            
+            # If there is an opponent's piece, fill the entire square with red
+            if target_piece is not None and target_piece.color != self.board.board.turn:
+                rect = pygame.Rect(col * 80, row * 80, 80, 80)
+                pygame.draw.rect(surface, (255, 150, 150), rect)  # Fill the entire square with light red
                     
     def show_move_dots(self, surface, from_square):
         """Draw yellow dots for squares that can be moved to"""
-        for move in self.board.board.legal_moves:
-            if move.from_square == from_square:
-                to_square = move.to_square
-                row = 7 - (to_square // 8)
-                col = to_square % 8
-                
-                # Draw yellow dot
-                center_x = col * 80 + 40
-                center_y = row * 80 + 40
-                pygame.draw.circle(surface, (255, 255, 0), (center_x, center_y), 15)  # Yellow dot
+        for move in self.board.moves_from(from_square):
+            to_square = move.to_square
+            row = 7 - (to_square // 8)
+            col = to_square % 8
+            
+            # Draw yellow dot
+            center_x = col * 80 + 40
+            center_y = row * 80 + 40
+            pygame.draw.circle(surface, (255, 255, 0), (center_x, center_y), 15)  # Yellow dot
                 
     def show_moves(self, surface, from_square):
         """Combined function (kept to avoid modifying main.py if not needed)"""
@@ -134,10 +171,20 @@ class Game:
     def is_stalemate(self):
         return self.board.is_stalemate()
 
+    def use_local_ai(self):
+        # Fallback when the engine service cannot be reached: search in this process instead
+        remote = self.ai
+        self.ai = ChessAI(chess.BLACK, book_path=self.book_path)
+        self.ai.sinks.extend(getattr(remote, 'sinks', []))
+        self.service = None
+        remote.close()
+
     def reset(self):
         self.board.reset()
         self.selected_square = None
         self.legal_moves = self.board.get_legal_moves()
+        if self.ai:
+            self.ai.reset()
 
     def result(self):
         # Return the result of the game
@@ -0,0 +1,118 @@
+from collections import OrderedDict
+
+import pygame
+
+# Rendered text surfaces kept for reuse (status lines change, so the cache is bounded)
+TEXT_CACHE_SIZE = 256
+
+
+def _opaque_surface(size):
+    surface = pygame.Surface(size)
+    # convert() needs a display surface to convert to; converted surfaces blit faster
+    if pygame.display.get_surface() is not None:
+        surface = surface.convert()
+    surface.fill((0, 0, 0))
+    return surface
+
+
+class FontCache:
+    """Fonts loaded once, and the surfaces of recently rendered text.
+
+    pygame.font.SysFont scans the installed fonts on every call, so each
+    (name, size, bold) font is created only once. name=None is pygame's
+    default font.
+    """
+
+    def __init__(self, max_texts=TEXT_CACHE_SIZE):
+        self.max_texts = max_texts
+        self._fonts = {}
+        self._texts = OrderedDict()
+
+    def font(self, size, name=None, bold=False):
+        key = (name, size, bold)
+        if key not in self._fonts:
+            if name is None:
+                self._fonts[key] = pygame.font.Font(None, size)
+            else:
+                self._fonts[key] = pygame.font.SysFont(name, size, bold=bold)
+        return self._fonts[key]
+
+    def render(self, text, size, color, name=None, bold=False):
+        """Antialiased text surface, rendered only the first time it is asked for."""
+        key = (text, size, color, name, bold)
+        surface = self._texts.get(key)
+        if surface is not None:
+            self._texts.move_to_end(key)
+            return surface
+        surface = self.font(size, name, bold).render(text, True, color)
+        self._texts[key] = surface
+        if len(self._texts) > self.max_texts:
+            self._texts.popitem(last=False)
+        return surface
+
+
+class BoardLayer:
+    """The static part of the board (squares and coordinates) pre-rendered into one surface.
+
+    Squares are cached per pair of square colors and coordinates per text
+    color, both for the current square size, so switching themes only
+    renders the layer whose colors changed (and nothing once every theme
+    has been seen). The composed board is cached per theme the same way,
+    so cycling back to a theme reuses it. It is what a frame starts from
+    and where single squares are copied from.
+    """
+
+    def __init__(self, fonts, size=80):
+        self.fonts = fonts
+        self.size = size
+        self._squares = {}
+        self._coordinates = {}
+        self._composed = {}
+
+    def set_size(self, size):
+        if size != self.size:
+            self.size = size
+            self._squares.clear()
+            self._coordinates.clear()
+            self._composed.clear()
+
+    def get(self, theme, surface_size):
+        """The board for a theme, as a surface of surface_size."""
+        squares_key = (theme.bg.light, theme.bg.dark)
+        coordinates_key = theme.text_color
+        key = (squares_key, coordinates_key, surface_size)
+        composed = self._composed.get(key)
+        if composed is None:
+            composed = _opaque_surface(surface_size)
+            composed.blit(self._squares_layer(squares_key, surface_size), (0, 0))
+            composed.blit(self._coordinates_layer(coordinates_key, surface_size), (0, 0))
+            self._composed[key] = composed
+        return composed
+
+    def _squares_layer(self, key, surface_size):
+        layer = self._squares.get((key, surface_size))
+        if layer is None:
+            light, dark = key
+            size = self.size
+            layer = _opaque_surface(surface_size)
+            for row in range(8):
+                for col in range(8):
+                    color = light if (row + col) % 2 == 0 else dark
+                    pygame.draw.rect(layer, color, (col * size, row * size, size, size))
+            self._squares[key, surface_size] = layer
+        return layer
+
+    def _coordinates_layer(self, color, surface_size):
+        layer = self._coordinates.get((color, surface_size))
+        if layer is None:
+            size = self.size
+            layer = pygame.Surface(surface_size, pygame.SRCALPHA)
+            # Column letters (A-H) below the board, row numbers (1-8) to its right
+            for col in range(8):
+                text = self.fonts.render(chr(ord('A') + col), 24, color)
+                layer.blit(text, text.get_rect(center=(col * size + size // 2, 8 * size + size // 2)))
+            for row in range(8):
+                text = self.fonts.render(str(8 - row), 24, color)
+                layer.blit(text, text.get_rect(center=(8 * size + size // 2, row * size + size // 2)))
+            self._coordinates[color, surface_size] = layer
+        return layer
@@ -3,6 +3,11 @@ import chess
 from theme import Theme
 from board import Board
 from game import Game
+from search_worker import SearchWorker
+from telemetry import ConsoleSink, OverlaySink, SearchStats
+from profiling import Profiler, profile_path
+from records import DEFAULT_PATH, GameRecord, GameWriter, move_stats_from_search
+import argparse
 import sys
 import time
 
@@ -11,19 +16,46 @@ WIDTH, HEIGHT = 640, 640
 SQSIZE = 80
 
 class Main:
-    def __init__(self, ai_mode=True):
+    def __init__(self, ai_mode=True, ai_workers=1, event_driven=True, fps=60, book_path=None, ponder=False,
+                 records_path=DEFAULT_PATH, service=None):
         pygame.init()
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
         pygame.display.set_caption('Chess')
-        self.game = Game(ai_enabled=ai_mode)
+        self.game = Game(ai_enabled=ai_mode, ai_workers=ai_workers, book_path=book_path, service=service)
         self.selected_square = None  # Store selected square (index 0-63)
         self.running = True
         self.ai_mode = ai_mode
         self.last_player_move_time = pygame.time.get_ticks()
+        # The AI searches on a background thread so the window keeps responding
+        self.ai_worker = SearchWorker(self.game.ai) if ai_mode else None
+        # ponder: keep searching the expected reply while the player thinks
+        self.ponder = ponder and ai_mode
+        # Search statistics drawn over the board ('s' toggles them)
+        self.stats_overlay = OverlaySink()
+        self.show_stats = False
+        # Section and frame timers (CHESS_PROFILE=1 or 'p'), drawn as an overlay
+        self.profiler = Profiler.from_env()
+        self._ai_search_start = None
+        self._ai_error = None  # Why the AI stopped playing (shown until the game is restarted)
+        # Every game is appended to this binary records file (see records.py; None = not saved)
+        self.records_path = records_path
+        self._records_writer = None  # Opened at the first save and kept for the session
+        self.ai_workers = ai_workers
+        self._move_stats = {}  # Ply -> MoveStats of the AI's moves
+        self._game_saved = False
+        # event_driven: redraw only changed squares and sleep while idle;
+        # otherwise redraw the whole window every frame. Both cap at fps.
+        self.event_driven = event_driven
+        self.fps = fps
+        self.clock = pygame.time.Clock()
+        self._drawn_states = None
+        self._drawn_texts = None
+        self._drawn_text_rects = []
         
 
 
     def _show_game_end_screen(self, result):
+        self._save_game()
         # Draw the final board state first
         self.game.show_bg(self.screen)
         self.game.show_pieces(self.screen)
@@ -33,9 +65,7 @@ class Main:
         overlay.fill((0, 0, 0, 32))  # Very transparent black (alpha=32)
         self.screen.blit(overlay, (0, 0))
         
-        # Prepare text with background
-        font_large = pygame.font.SysFont('Arial', 36)
-        font_small = pygame.font.SysFont('Arial', 20)
+        fonts = self.game.fonts
         
         # Create background for text
         bg_height = 80
@@ -45,17 +75,17 @@ class Main:
         
         # Determine text based on result
         if result == '1-0':
-            title = font_large.render('White Wins!', True, (255, 255, 255))
-            subtitle = font_small.render('Checkmate', True, (200, 200, 200))
+            title = fonts.render('White Wins!', 36, (255, 255, 255), 'Arial')
+            subtitle = fonts.render('Checkmate', 20, (200, 200, 200), 'Arial')
         elif result == '0-1':
-            title = font_large.render('Black Wins!', True, (255, 255, 255))
-            subtitle = font_small.render('Checkmate', True, (200, 200, 200))
+            title = fonts.render('Black Wins!', 36, (255, 255, 255), 'Arial')
+            subtitle = fonts.render('Checkmate', 20, (200, 200, 200), 'Arial')
         else:  # Draw
-            title = font_large.render('Draw', True, (255, 255, 255))
-            subtitle = font_small.render('Stalemate', True, (200, 200, 200))
+            title = fonts.render('Draw', 36, (255, 255, 255), 'Arial')
+            subtitle = fonts.render('Stalemate', 20, (200, 200, 200), 'Arial')
         
         # Add instructions
-        instructions = font_small.render('Press R to restart or ESC to quit', True, (200, 200, 200))
+        instructions = fonts.render('Press R to restart or ESC to quit', 20, (200, 200, 200), 'Arial')
         
         # Position text at bottom of screen with background
         title_rect = title.get_rect(center=(WIDTH//2, HEIGHT - 60))
@@ -72,133 +102,352 @@ class Main:
         # Wait for user to close or restart
         waiting = True
         while waiting:
-            for event in pygame.event.get():
+            for event in [pygame.event.wait()] + pygame.event.get():
                 if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
+                    self._quit()
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_r:  # Restart on 'R'
-                        self.game.reset()
-                        self.selected_square = None
+                        self._restart()
                         waiting = False
                     elif event.key == pygame.K_ESCAPE:  # Exit on ESC
-                        pygame.quit()
-                        sys.exit()
+                        self._quit()
 
     def mainloop(self):
+        if self.event_driven:
+            self._event_loop()
+            return
+        profiler = self.profiler
         while self.running:
+            profiler.frame_start()
             current_time = pygame.time.get_ticks()
-            self.screen.fill((0, 0, 0))
-            self.game.show_bg(self.screen)
+            # show_bg covers the whole window, so the frame needs no fill first
+            with profiler.section('show_bg'):
+                self.game.show_bg(self.screen)
             
             # Check for game over conditions
-            if self.game.is_checkmate():
+            with profiler.section('game over checks'):
+                checkmate = self.game.is_checkmate()
+                stalemate = not checkmate and self.game.is_stalemate()
+            if checkmate:
                 result = self.game.result()
                 self._show_game_end_screen(result)
                 continue
-            elif self.game.is_stalemate():
+            elif stalemate:
                 result = self.game.result()
                 self._show_game_end_screen(result)
                 continue
             
-            # AI's turn in AI mode
-            if (self.ai_mode and 
-                self.game.board.board.turn == chess.BLACK and 
-                self.selected_square is None and 
-                current_time - self.last_player_move_time > 1000):  # Wait 1 second after player move
-                ai_move = self.game.ai.choose_move(self.game.board.board)
-                if ai_move:
-                    # Check if the move is a capture
-                    if self.game.board.get_piece_at(ai_move.to_square):
-                        self.game.capture_sound.play()
-                    else:
-                        self.game.move_sound.play()
-                    
-                    self.game.board.board.push(ai_move)
-                    # Track AI move for highlighting
-                    self.last_move = [ai_move.from_square, ai_move.to_square]
-                    self.game.last_move = {
-                        'squares': self.last_move,
-                        'color': 'black'
-                    }
-                    pygame.time.delay(500)  # Slight delay to show AI's thinking
+            with profiler.section('update_ai'):
+                self._update_ai(current_time)
             
             # Draw red squares for opponent's pieces that can be captured
             if self.selected_square is not None:
                 self.game.show_captures(self.screen, self.selected_square)
             
             # Draw pieces to prevent them from being covered
-            self.game.show_pieces(self.screen)
+            with profiler.section('show_pieces'):
+                self.game.show_pieces(self.screen)
             
             # Draw yellow dots for squares that can be moved to
             if self.selected_square is not None:
                 self.game.show_move_dots(self.screen, self.selected_square)
             
             # Display player turn only
-            font = pygame.font.SysFont('Arial', 20)
-            turn_text = "Turn: " + ("White (Player 1)" if self.game.board.board.turn == chess.WHITE else "Black (Player 2)")
-            turn_render = font.render(turn_text, True, (255, 255, 255))
-            self.screen.blit(turn_render, (10, 10))
-            
-
+            for text, pos in self._status_texts():
+                self.screen.blit(self.game.fonts.render(text, 20, (255, 255, 255), 'Arial'), pos)
 
             for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    x, y = pygame.mouse.get_pos()
-                    col = x // SQSIZE
-                    row = 7 - (y // SQSIZE)  # Python-chess coordinate system: a1 = 0, h8 = 63
-                    clicked_square = row * 8 + col
-                    piece = self.game.board.get_piece_at(clicked_square)
-                    if self.selected_square is None:
-                        # Select player's own piece
+                self._handle_event(event)
+
+            pygame.display.flip()
+            profiler.frame_end()
+            self.clock.tick(self.fps)
+
+    def _event_loop(self):
+        """Redraw only what changed, and sleep in the event queue while nothing happens."""
+        self._drawn_states = None  # None forces a full redraw
+        self._drawn_texts = None
+        profiler = self.profiler
+        while self.running:
+            profiler.frame_start()
+            # Check for game over conditions
+            with profiler.section('game over checks'):
+                game_over = self.game.is_checkmate() or self.game.is_stalemate()
+            if game_over:
+                self._show_game_end_screen(self.game.result())
+                self._drawn_states = None
+                continue
+
+            with profiler.section('update_ai'):
+                self._update_ai(pygame.time.get_ticks())
+            with profiler.section('render'):
+                self._render_changes()
+            profiler.frame_end()
+
+            if self._ai_to_move():
+                # Waiting for or polling the AI: keep ticking at the capped frame rate
+                self.clock.tick(self.fps)
+                events = pygame.event.get()
+            else:
+                # Nothing to animate: block until the player does something
+                events = [pygame.event.wait()] + pygame.event.get()
+            for event in events:
+                self._handle_event(event)
+
+    def _render_changes(self):
+        """Redraw the squares whose contents changed and update only those rects."""
+        states = self.game.square_states(self.selected_square)
+        texts = self._status_texts()
+        rendered = [(self.game.fonts.render(text, 20, (255, 255, 255), 'Arial'), pos) for text, pos in texts]
+        text_rects = [surface.get_rect(topleft=pos) for surface, pos in rendered]
+
+        if self._drawn_states is None:
+            dirty = set(chess.SQUARES)
+        else:
+            dirty = {square for square in chess.SQUARES if states[square] != self._drawn_states[square]}
+        under_text = {square for square in chess.SQUARES
+                      if self.game.square_rect(square).collidelist(text_rects + self._drawn_text_rects) != -1}
+        # Text is blended onto the squares, so it can only be redrawn on freshly drawn squares
+        if texts != self._drawn_texts or dirty & under_text:
+            dirty |= under_text
+        if not dirty:
+            return
+
+        if self._drawn_states is None:
+            self.screen.fill((0, 0, 0))
+        rects = []
+        for square in dirty:
+            self.game.show_square(self.screen, square, states[square])
+            rects.append(self.game.square_rect(square))
+        for surface, pos in rendered:
+            self.screen.blit(surface, pos)
+
+        if self._drawn_states is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+        self._drawn_states = states
+        self._drawn_texts = texts
+        self._drawn_text_rects = text_rects
+
+    def _status_texts(self):
+        """Lines of text drawn over the board, as (text, position)."""
+        turn_text = "Turn: " + ("White (Player 1)" if self.game.board.board.turn == chess.WHITE else "Black (Player 2)")
+        lines = [turn_text]
+        if self._ai_error is not None:
+            lines.append(self._ai_error)
+        # Show how far the AI has got while it is thinking
+        if self.ai_mode and self.ai_worker.busy:
+            progress = self.ai_worker.progress()
+            lines.append(f"AI thinking... depth {progress['current_depth']}, nodes {progress['nodes']}")
+        # One line under the other, so the error and the AI progress never overlap
+        texts = [(line, (10, 10 + 25 * index)) for index, line in enumerate(lines)]
+        for index, line in enumerate(self.profiler.lines()):
+            texts.append((line, (10, 10 + 25 * (len(lines) + index))))
+        if self.show_stats:
+            lines = self.stats_overlay.lines()
+            for index, line in enumerate(lines):
+                texts.append((line, (10, HEIGHT - 25 * (len(lines) - index) - 5)))
+        return texts
+
+    def _update_ai(self, current_time):
+        # AI's turn in AI mode
+        board = self.game.board.board
+        if (self._ai_to_move() and 
+            self.selected_square is None and 
+            not self.ai_worker.busy and
+            self._ai_error is None and
+            (current_time - self.last_player_move_time > 1000 or  # Wait 1 second after player move
+             self.ai_worker.is_ponder_hit(board))):  # ...unless the answer is (nearly) ready
+            was_pondering = self.ai_worker.pondering
+            hit = self.ai_worker.is_ponder_hit(board)
+            self.ai_worker.start(board)
+            self._ai_search_start = time.perf_counter()
+            if was_pondering:
+                self._report_ponder(board, hit)
+
+        # Pick up the AI move once the background search has finished
+        if self.ai_mode and self.ai_worker.busy:
+            try:
+                ai_move = self.ai_worker.poll()
+            except Exception as error:
+                self._ai_failed(error)
+                return
+            if ai_move:
+                if self.profiler.enabled and self._ai_search_start is not None:
+                    self.profiler.record('ai search', (time.perf_counter() - self._ai_search_start) * 1000)
+                # Check if the move is a capture
+                if self.game.board.get_piece_at(ai_move.to_square):
+                    self.game.capture_sound.play()
+                else:
+                    self.game.move_sound.play()
+                
+                stats = getattr(self.game.ai, 'last_stats', None)  # ParallelSearch reports none
+                self._move_stats[len(board.move_stack)] = move_stats_from_search(stats)
+                self.game.board.push(ai_move)
+                # Track AI move for highlighting
+                self.last_move = [ai_move.from_square, ai_move.to_square]
+                self.game.last_move = {
+                    'squares': self.last_move,
+                    'color': 'black'
+                }
+                if self.ponder and not self.game.board.is_game_over():
+                    self._start_pondering()
+
+    def _ai_failed(self, error):
+        if self.game.service:
+            # The next frame starts the same search again, now in this process
+            print(f"[AI] Engine service failed ({type(error).__name__}: {error}), searching locally instead")
+            self.game.use_local_ai()
+            self.ai_worker.ai = self.game.ai
+        else:
+            print(f"[AI] Search failed: {type(error).__name__}: {error}")
+            self._ai_error = f"AI error: {error}"
+
+    def _handle_event(self, event):
+        if event.type == pygame.QUIT:
+            self._quit()
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            if self._ai_to_move():
+                return  # The board is locked while it is the AI's turn
+            x, y = pygame.mouse.get_pos()
+            col = x // SQSIZE
+            row = 7 - (y // SQSIZE)  # Python-chess coordinate system: a1 = 0, h8 = 63
+            clicked_square = row * 8 + col
+            piece = self.game.board.get_piece_at(clicked_square)
+            if self.selected_square is None:
+                # Select player's own piece
+                if piece and piece.color == self.game.board.board.turn:
+                    self.selected_square = clicked_square
+            else:
+                # Check that source and destination squares are different
+                if self.selected_square != clicked_square:
+                    # Try to make a move
+                    move_uci = self._get_uci(self.selected_square, clicked_square)
+                    # Get piece information before making the move
+                    piece = self.game.board.get_piece_at(self.selected_square)
+                    captured = self.game.board.get_piece_at(clicked_square)
+                    from_square = chess.square_name(self.selected_square)
+                    to_square = chess.square_name(clicked_square)
+                    
+                    if self.game.play_move(move_uci):
+                        # Print user's move details
+                        move_info = f"\nUser Move: {piece.symbol().upper() if piece else 'None'} from {from_square} to {to_square}"
+                        if captured:
+                            move_info += f" captures {captured.symbol().upper()}"
+                        print(move_info)
+                        # Track the last move squares for highlighting
+                        from_sq = chess.parse_square(move_uci[0:2])
+                        to_sq = chess.parse_square(move_uci[2:4])
+                        self.last_move = [from_sq, to_sq]
+                        self.game.last_move = {
+                            'squares': self.last_move,
+                            'color': 'white' if self.game.board.board.turn == chess.BLACK else 'black'
+                        }
+                        self.selected_square = None
+                        self.last_player_move_time = pygame.time.get_ticks()  # Update last move time
+                    else:
+                        # If invalid, reselect
                         if piece and piece.color == self.game.board.board.turn:
                             self.selected_square = clicked_square
-                    else:
-                        # Check that source and destination squares are different
-                        if self.selected_square != clicked_square:
-                            # Try to make a move
-                            move_uci = self._get_uci(self.selected_square, clicked_square)
-                            # Get piece information before making the move
-                            piece = self.game.board.get_piece_at(self.selected_square)
-                            captured = self.game.board.get_piece_at(clicked_square)
-                            from_square = chess.square_name(self.selected_square)
-                            to_square = chess.square_name(clicked_square)
-                            
-                            if self.game.play_move(move_uci):
-                                # Print user's move details
-                                move_info = f"\nUser Move: {piece.symbol().upper() if piece else 'None'} from {from_square} to {to_square}"
-                                if captured:
-                                    move_info += f" captures {captured.symbol().upper()}"
-                                print(move_info)
-                                # Track the last move squares for highlighting
-                                from_sq = chess.parse_square(move_uci[0:2])
-                                to_sq = chess.parse_square(move_uci[2:4])
-                                self.last_move = [from_sq, to_sq]
-                                self.game.last_move = {
-                                    'squares': self.last_move,
-                                    'color': 'white' if self.game.board.board.turn == chess.BLACK else 'black'
-                                }
-                                self.selected_square = None
-                                self.last_player_move_time = pygame.time.get_ticks()  # Update last move time
-                            else:
-                                # If invalid, reselect
-                                if piece and piece.color == self.game.board.board.turn:
-                                    self.selected_square = clicked_square
-                                else:
-                                    self.selected_square = None
                         else:
-                            # Deselect if clicked on the same square twice
                             self.selected_square = None
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_r:
-                        self.game.reset()
-                        self.selected_square = None
+                else:
+                    # Deselect if clicked on the same square twice
+                    self.selected_square = None
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_r:
+                self._restart()
+            elif event.key == pygame.K_t:
+                self.game.config.change_theme()
+                # The board layer is cached per theme colors; every square is redrawn from the new one
+                self._drawn_states = None
+            elif event.key == pygame.K_s:
+                self._toggle_stats()
+            elif event.key == pygame.K_p:
+                self.profiler.toggle()
+            elif event.key == pygame.K_m and self.ai_mode:
+                # Profile the next AI move with cProfile
+                path = profile_path()
+                self.ai_worker.profile_next_move(path)
+                print(f"[Profile] The next AI move will be profiled to {path}")
 
+    def _toggle_stats(self):
+        # The sink is only attached while shown, so hidden statistics cost nothing
+        sinks = getattr(self.game.ai, 'sinks', None)
+        if sinks is None:
+            return  # ParallelSearch reports no statistics
+        self.show_stats = not self.show_stats
+        if self.show_stats:
+            sinks.append(self.stats_overlay)
+        else:
+            sinks.remove(self.stats_overlay)
 
-            pygame.display.flip()
+    def _start_pondering(self):
+        # The line the finished search expects: the AI's move, then the player's most likely reply
+        board = self.game.board.board
+        pv = getattr(self.game.ai, 'last_pv', [])
+        if len(pv) > 1 and board.move_stack and pv[0] == board.peek() and board.is_legal(pv[1]):
+            self.ai_worker.ponder(board, pv[1])
+
+    def _report_ponder(self, board, hit):
+        """Send the ponder result to the AI's telemetry sinks, next to its move statistics."""
+        ai = self.game.ai
+        sinks = list(ai.sinks)
+        if ai.verbose:
+            sinks.append(ConsoleSink())
+        stats = SearchStats(board.fen(), board.turn, None, 'ponder')
+        stats.ponder_hit = hit
+        stats.ponder_hits = self.ai_worker.ponder_hits
+        stats.ponder_misses = self.ai_worker.ponder_misses
+        for sink in sinks:
+            sink.emit(stats)
+
+    def _ai_to_move(self):
+        return self.ai_mode and self.game.board.board.turn == chess.BLACK
+
+    def _save_game(self):
+        # Append the game to the records file once, finished or not
+        board = self.game.board.board
+        if self.records_path is None or self._game_saved or not board.move_stack:
+            return
+        stats = [self._move_stats.get(ply) for ply in range(len(board.move_stack))]
+        record = GameRecord.from_board(board, white='human', black='ai' if self.ai_mode else 'human',
+                                       workers=self.ai_workers, time_limit=getattr(self.game.ai, 'time_limit', None),
+                                       stats=stats)
+        try:
+            if self._records_writer is None:
+                self._records_writer = GameWriter(self.records_path)
+            self._records_writer.write(record)
+        except (OSError, ValueError) as error:
+            # Not a records file or not writable: keep playing, just without saving
+            print(f"[Records] Could not save the game to {self.records_path}: {error}")
+            self.records_path = None
+            return
+        self._game_saved = True
+        print(f"[Records] Game saved to {self.records_path} ({len(record.moves)} moves, {record.result})")
+
+    def _restart(self):
+        self._stop_ai()
+        self._save_game()
+        self.game.reset()
+        self.selected_square = None
+        self._move_stats = {}
+        self._game_saved = False
+        self._ai_error = None
+
+    def _quit(self):
+        self._stop_ai()
+        self._save_game()
+        if self._records_writer is not None:
+            self._records_writer.close()
+        pygame.quit()
+        sys.exit()
+
+    def _stop_ai(self):
+        # Cancel a running AI search before the position it works on goes away
+        if self.ai_mode:
+            self.ai_worker.cancel()
 
     def _get_uci(self, from_square, to_square):
         # Convert index 0-63 to UCI string, example: 12, 28 -> 'e2e4'
@@ -210,5 +459,8 @@ class Main:
         
 
 if __name__ == "__main__":
-    app = Main()
+    parser = argparse.ArgumentParser(description="Chess game")
+    parser.add_argument('--service', help="play the AI through an engine service at 'host:port' or 'unix:/path'")
+    args = parser.parse_args()
+    app = Main(service=args.service)
     app.mainloop()
\ No newline at end of file
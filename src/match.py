@@ -0,0 +1,209 @@
+"""Headless self-play matches between two ChessAI settings.
+
+    python src/match.py --engine1 '{"depth": 3}' --engine2 '{"depth": 3, "use_alpha_beta": false}' \\
+        --movetime 0.5 --concurrency 8 --pgn match.pgn
+
+Every opening is played twice with colors swapped. Games run in parallel
+on a process pool; the result is a PGN file plus score, Elo difference
+(with a 95% error bar), average nodes per second and average move time.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import chess
+import chess.pgn
+
+from ai import ChessAI
+
+# Short, balanced openings (after a few book moves)
+DEFAULT_OPENINGS = [
+    chess.STARTING_FEN,
+    "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2",
+    "rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2",
+    "rnbqkbnr/ppp1pppp/8/3p4/3P4/8/PPP1PPPP/RNBQKBNR w KQkq - 0 2",
+    "rnbqkb1r/pppppppp/5n2/8/2P5/8/PP1PPPPP/RNBQKBNR w KQkq - 1 2",
+    "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+    "rnbqkbnr/pppp1ppp/4p3/8/3PP3/8/PPP2PPP/RNBQKBNR b KQkq - 0 2",
+    "rnbqkb1r/pppp1ppp/4pn2/8/2PP4/8/PP2PPPP/RNBQKBNR w KQkq - 0 3",
+]
+
+# Games longer than this are adjudicated as draws
+MAX_PLIES = 300
+
+
+def _make_engine(config, color):
+    """ChessAI from a config dict: 'depth' is the search depth, the rest are ChessAI options."""
+    options = {key: value for key, value in config.items() if key != 'depth'}
+    ai = ChessAI(color, **options)
+    ai.verbose = False
+    return ai
+
+
+def play_game(index, fen, white, black, limits):
+    """Pool task: play one game. white/black are (name, config) pairs."""
+    board = chess.Board(fen)
+    engines = {
+        chess.WHITE: _make_engine(white[1], chess.WHITE),
+        chess.BLACK: _make_engine(black[1], chess.BLACK)
+    }
+    configs = {chess.WHITE: white[1], chess.BLACK: black[1]}
+    stats = {chess.WHITE: [0, 0, 0.0], chess.BLACK: [0, 0, 0.0]}  # moves, nodes, seconds
+
+    while not board.is_game_over(claim_draw=True) and board.ply() < MAX_PLIES:
+        color = board.turn
+        ai = engines[color]
+        start = time.perf_counter()
+        move = ai.get_best_move(board, depth=configs[color].get('depth'),
+                                time_limit=limits['movetime'], node_limit=limits['nodes'],
+                                iterative=limits['movetime'] is not None or limits['nodes'] is not None)
+        stats[color][0] += 1
+        stats[color][1] += ai.calculations
+        stats[color][2] += time.perf_counter() - start
+        board.push(move)
+
+    result = board.result(claim_draw=True)
+    if result == '*':
+        result = '1/2-1/2'  # Adjudicated at MAX_PLIES
+
+    game = chess.pgn.Game.from_board(board)
+    game.headers['Event'] = 'ChessAI self-play'
+    game.headers['Round'] = str(index + 1)
+    game.headers['White'] = white[0]
+    game.headers['Black'] = black[0]
+    game.headers['Result'] = result
+    return {
+        'index': index,
+        'white': white[0],
+        'black': black[0],
+        'result': result,
+        'pgn': str(game),
+        'stats': {white[0]: stats[chess.WHITE], black[0]: stats[chess.BLACK]}
+    }
+
+
+def elo_difference(wins, draws, losses):
+    """Elo difference and 95% error bar from the first player's results."""
+    games = wins + draws + losses
+    if games == 0:
+        return 0.0, float('inf')
+    score = (wins + 0.5 * draws) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    margin = 1.96 * math.sqrt(variance / games)
+
+    def to_elo(p):
+        if p <= 0:
+            return float('-inf')
+        if p >= 1:
+            return float('inf')
+        return -400 * math.log10(1 / p - 1)
+
+    elo = to_elo(score)
+    error = (to_elo(min(score + margin, 1)) - to_elo(max(score - margin, 0))) / 2
+    return elo, error
+
+
+def run_match(engine1, engine2, openings, limits, concurrency=None, pgn_path=None, games_per_opening=2):
+    """Play every opening games_per_opening times, alternating colors."""
+    names = ('engine1', 'engine2')
+    players = [(names[0], engine1), (names[1], engine2)]
+    jobs = []
+    for fen in openings:
+        for repeat in range(games_per_opening):
+            white, black = (players[0], players[1]) if repeat % 2 == 0 else (players[1], players[0])
+            jobs.append((len(jobs), fen, white, black))
+
+    results = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=concurrency or os.cpu_count() or 1) as pool:
+        futures = [pool.submit(play_game, index, fen, white, black, limits) for index, fen, white, black in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            results[result['index']] = result
+            print(f"Game {result['index'] + 1}/{len(jobs)}: {result['white']} - {result['black']} "
+                  f"{result['result']}", file=sys.stderr)
+
+    if pgn_path:
+        with open(pgn_path, 'w') as f:
+            for result in results:
+                f.write(result['pgn'] + '\n\n')
+    return summarize(results, names)
+
+
+def summarize(results, names):
+    first = names[0]
+    wins = draws = losses = 0
+    totals = {name: [0, 0, 0.0] for name in names}
+    for result in results:
+        if result['result'] == '1/2-1/2':
+            draws += 1
+        elif (result['result'] == '1-0') == (result['white'] == first):
+            wins += 1
+        else:
+            losses += 1
+        for name, (moves, nodes, seconds) in result['stats'].items():
+            totals[name][0] += moves
+            totals[name][1] += nodes
+            totals[name][2] += seconds
+
+    elo, error = elo_difference(wins, draws, losses)
+    summary = {
+        'games': len(results),
+        'wins': wins,
+        'draws': draws,
+        'losses': losses,
+        'score': (wins + 0.5 * draws) / len(results) if results else 0.0,
+        'elo': elo,
+        'elo_error': error,
+        'engines': {}
+    }
+    for name, (moves, nodes, seconds) in totals.items():
+        summary['engines'][name] = {
+            'moves': moves,
+            'nps': nodes / seconds if seconds else 0.0,
+            'avg_move_time': seconds / moves if moves else 0.0
+        }
+    return summary
+
+
+def print_summary(summary, engine1, engine2):
+    print(f"engine1: {json.dumps(engine1)}")
+    print(f"engine2: {json.dumps(engine2)}")
+    print(f"Games: {summary['games']}  +{summary['wins']} ={summary['draws']} -{summary['losses']}  "
+          f"Score: {100 * summary['score']:.1f}%")
+    print(f"Elo difference (engine1 - engine2): {summary['elo']:+.1f} +/- {summary['elo_error']:.1f}")
+    for name, stats in summary['engines'].items():
+        print(f"{name}: {stats['nps']:.0f} nodes/s, {1000 * stats['avg_move_time']:.0f} ms/move "
+              f"over {stats['moves']} moves")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Self-play match between two ChessAI settings")
+    parser.add_argument('--engine1', type=json.loads, default={'depth': 3},
+                        help='JSON object: "depth" plus ChessAI options, e.g. \'{"depth": 3, "tt_size": 0}\'')
+    parser.add_argument('--engine2', type=json.loads, default={'depth': 3})
+    parser.add_argument('--openings', help="file with one opening FEN per line (default: built-in set)")
+    parser.add_argument('--games-per-opening', type=int, default=2)
+    parser.add_argument('--movetime', type=float, help="seconds per move")
+    parser.add_argument('--nodes', type=int, help="nodes per move")
+    parser.add_argument('--concurrency', type=int, help="games played at once (default: all cores)")
+    parser.add_argument('--pgn', help="write all games to this PGN file")
+    args = parser.parse_args(argv)
+
+    openings = DEFAULT_OPENINGS
+    if args.openings:
+        with open(args.openings) as f:
+            openings = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+    limits = {'movetime': args.movetime, 'nodes': args.nodes}
+    summary = run_match(args.engine1, args.engine2, openings, limits, args.concurrency, args.pgn,
+                        args.games_per_opening)
+    print_summary(summary, args.engine1, args.engine2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
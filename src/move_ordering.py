@@ -0,0 +1,105 @@
+import chess
+
+# Rough piece values used only to rank captures (MVV-LVA)
+ORDER_VALUES = {
+    chess.PAWN: 1,
+    chess.KNIGHT: 3,
+    chess.BISHOP: 3,
+    chess.ROOK: 5,
+    chess.QUEEN: 9,
+    chess.KING: 100
+}
+
+# Score bands: hash move > captures > promotions > killers > history
+HASH_MOVE_SCORE = 1 << 40
+CAPTURE_SCORE = 1 << 34
+PROMOTION_SCORE = 1 << 33
+KILLER_SCORE = 1 << 32
+HISTORY_LIMIT = (1 << 32) - 1
+
+MAX_PLY = 128
+
+
+class MoveOrderer:
+    """Sorts moves so that the ones most likely to cause a cutoff come first.
+
+    Order: hash move, captures (most valuable victim / least valuable
+    attacker), promotions, two killer moves per ply, then quiet moves by
+    history score. The history table lives for a whole game; killers are
+    cleared before every search.
+    """
+
+    def __init__(self, max_ply=MAX_PLY):
+        self.max_ply = max_ply
+        self.killers = [[None, None] for _ in range(max_ply)]
+        # Indexed by color * 4096 + from_square * 64 + to_square
+        self.history = [0] * (2 * 64 * 64)
+
+    def score_move(self, board, move, ply, hash_move=None):
+        if move == hash_move:
+            return HASH_MOVE_SCORE
+        if board.is_capture(move):
+            if board.is_en_passant(move):
+                victim = chess.PAWN
+            else:
+                victim = board.piece_type_at(move.to_square)
+            attacker = board.piece_type_at(move.from_square)
+            return CAPTURE_SCORE + 10 * ORDER_VALUES[victim] - ORDER_VALUES[attacker]
+        if move.promotion:
+            return PROMOTION_SCORE + ORDER_VALUES[move.promotion]
+        if ply < self.max_ply:
+            killers = self.killers[ply]
+            if move == killers[0]:
+                return KILLER_SCORE + 1
+            if move == killers[1]:
+                return KILLER_SCORE
+        return self.history[board.turn * 4096 + move.from_square * 64 + move.to_square]
+
+    def order(self, board, moves, ply, hash_move=None):
+        """Return the moves as a list, best candidates first."""
+        return sorted(moves, key=lambda move: self.score_move(board, move, ply, hash_move), reverse=True)
+
+    def record_cutoff(self, board, move, ply, depth):
+        """Remember a quiet move that caused a cutoff at this ply."""
+        if board.is_capture(move) or move.promotion:
+            return
+        if ply < self.max_ply:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        index = board.turn * 4096 + move.from_square * 64 + move.to_square
+        self.history[index] = min(self.history[index] + depth * depth, HISTORY_LIMIT)
+
+    def new_search(self):
+        """Called before every root search: drop killers, age the history."""
+        self.killers = [[None, None] for _ in range(self.max_ply)]
+        self.history = [value // 2 for value in self.history]
+
+    def reset(self):
+        """Forget everything (new game)."""
+        self.killers = [[None, None] for _ in range(self.max_ply)]
+        self.history = [0] * (2 * 64 * 64)
+
+
+class NoMoveOrdering:
+    """Searches moves in generator order, apart from the hash move.
+
+    Useful as a baseline to measure what MoveOrderer saves.
+    """
+
+    def order(self, board, moves, ply, hash_move=None):
+        moves = list(moves)
+        if hash_move is not None and hash_move in moves:
+            moves.remove(hash_move)
+            moves.insert(0, hash_move)
+        return moves
+
+    def record_cutoff(self, board, move, ply, depth):
+        pass
+
+    def new_search(self):
+        pass
+
+    def reset(self):
+        pass
@@ -0,0 +1,94 @@
+import chess
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; only the 'numpy' evaluation backend needs it
+    np = None
+
+# Piece bitboards in the order of the rows of the score table
+MASK_ORDER = [(color, piece_type) for color in chess.COLORS for piece_type in chess.PIECE_TYPES]
+EMPTY = len(MASK_ORDER)  # Row of zeros for empty squares
+
+
+class NumpyEvaluator:
+    """Scores all children of a position with a few NumPy operations.
+
+    The AI's score tables become one (12 + 1) x 64 array, one row per
+    colored piece type plus a zero row for empty squares. The piece on
+    every square is read from the position's bitboards (board.pieces_mask),
+    and the score change of every move (including castling, en passant
+    and promotion) is computed at once by indexing that array. The result
+    equals ChessAI.evaluate_board of each child, apart from terminal
+    positions, which terminal_score() checks one child at a time.
+    """
+
+    def __init__(self, ai, mate_score):
+        if np is None:
+            raise ImportError("The 'numpy' evaluation backend needs numpy (pip install numpy)")
+        self.color = ai.color
+        self.mate_score = mate_score
+        rows = [ai.score_tables[color][piece_type] for color, piece_type in MASK_ORDER]
+        self.table = np.array(rows + [[0] * 64], dtype=np.int64)
+        self.row = {(color, piece_type): index for index, (color, piece_type) in enumerate(MASK_ORDER)}
+
+    def occupants(self, board):
+        """Row of the score table for the piece on each square (EMPTY if none)."""
+        words = np.array([board.pieces_mask(piece_type, color) for color, piece_type in MASK_ORDER], dtype='<u8')
+        # Little-endian words: bit i of a word lands at column i, i.e. the square
+        bits = np.unpackbits(words.view(np.uint8).reshape(EMPTY, 8), axis=1, bitorder='little')
+        return np.where(bits.any(axis=0), bits.argmax(axis=0), EMPTY)
+
+    def child_scores(self, board, base_score, moves):
+        """Static score after each move, given the score of the current position."""
+        count = len(moves)
+        if count == 0:
+            return []
+        table = self.table
+        occupant = self.occupants(board)
+        color = board.turn
+        from_squares = np.fromiter((move.from_square for move in moves), dtype=np.intp, count=count)
+        to_squares = np.fromiter((move.to_square for move in moves), dtype=np.intp, count=count)
+        promotions = np.fromiter((move.promotion or 0 for move in moves), dtype=np.intp, count=count)
+
+        moved = occupant[from_squares]
+        captured = occupant[to_squares]
+        placed = np.where(promotions > 0, self.row[color, chess.PAWN] + promotions - 1, moved)
+        delta = table[placed, to_squares] - table[moved, from_squares] - table[captured, to_squares]
+
+        # Castling: the king moves two files, the rook jumps over it
+        castling = (moved == self.row[color, chess.KING]) & (np.abs(to_squares - from_squares) == 2)
+        if castling.any():
+            kingside = to_squares > from_squares
+            rank_start = from_squares - from_squares % 8
+            rook_from = np.where(kingside, rank_start + 7, rank_start)
+            rook_to = np.where(kingside, rank_start + 5, rank_start + 3)
+            rook = self.row[color, chess.ROOK]
+            delta += np.where(castling, table[rook, rook_to] - table[rook, rook_from], 0)
+
+        # En passant: a pawn changes file onto an empty square
+        en_passant = ((moved == self.row[color, chess.PAWN]) & (captured == EMPTY) &
+                      (from_squares % 8 != to_squares % 8))
+        if en_passant.any():
+            # The captured pawn stands on the target file, on the rank the pawn came from
+            captured_square = from_squares - from_squares % 8 + to_squares % 8
+            delta -= np.where(en_passant, table[self.row[not color, chess.PAWN], captured_square], 0)
+
+        return (base_score + delta).tolist()
+
+    def terminal_score(self, board, move, ply):
+        """Score for the mover if the move ends the game or leaves a dead draw, else None.
+
+        `ply` is the distance of `board` from the root; a mate scores
+        mate_score minus the plies to reach it.
+        """
+        board.push(move)
+        try:
+            if not any(board.generate_legal_moves()):
+                if board.is_check():
+                    return self.mate_score - ply - 1
+                return 0  # Stalemate
+            if board.is_insufficient_material():
+                return 0
+            return None
+        finally:
+            board.pop()
@@ -0,0 +1,283 @@
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from ai import ChessAI, ENDGAME_DEPTH, MATE_BOUND, MATE_SCORE, MAX_DEPTH, SearchAborted, fixed_depth
+from book import OpeningBook
+from tablebase import Tablebase
+from move_ordering import MoveOrderer
+from telemetry import ConsoleSink, SearchStats, publish
+
+# State of each pool process, set up once by _init_worker
+_worker_ai = None
+_shared_alpha = None
+_shared_stop = None
+
+
+def _init_worker(color, ai_options, shared_alpha, shared_stop):
+    global _worker_ai, _shared_alpha, _shared_stop
+    # Every process keeps its own AI, so its tables stay warm between tasks
+    _worker_ai = ChessAI(color, **ai_options)
+    _worker_ai.verbose = False  # Statistics are reported by the parent
+    _shared_alpha = shared_alpha
+    _shared_stop = shared_stop
+
+
+def _search_move(board, move, depth, node_limit=None):
+    """Pool task: score one root move against the best score found so far."""
+    alpha = _shared_alpha.value
+    # Scores are whole centipawns: search one below alpha so a move that ties the
+    # best score gets an exact score; the tie is then broken by root move order,
+    # not finishing order.
+    window_alpha = alpha - 1
+    try:
+        score = _worker_ai.search_root_move(board, move, depth, window_alpha, _shared_stop, node_limit)
+    except SearchAborted:
+        # No score, but the nodes still count against the parent's budget
+        return None, False, _worker_ai.calculations, _worker_ai.cutoffs
+    exact = score > window_alpha
+    if exact:
+        with _shared_alpha.get_lock():
+            if score > _shared_alpha.value:
+                _shared_alpha.value = score
+    return score, exact, _worker_ai.calculations, _worker_ai.cutoffs
+
+
+class ParallelSearch:
+    """Splits the root moves of a search across a pool of processes.
+
+    The first root move is searched alone to get a good alpha bound, then
+    the remaining moves are searched in parallel (young brothers wait).
+    Workers share the best score so far, so later moves are searched with
+    a tighter window. Has the same choose_move interface as ChessAI.
+    """
+
+    def __init__(self, color, workers=None, book_path=None, tablebase_path=None, **ai_options):
+        self.color = color
+        # Book moves are looked up here; the workers only ever search
+        self.book = OpeningBook(book_path) if book_path else None
+        # Root tablebase probes happen here, the workers probe inside their subtrees
+        self.tablebase = Tablebase(tablebase_path) if tablebase_path else None
+        if tablebase_path:
+            ai_options['tablebase_path'] = tablebase_path
+        self.workers = workers or os.cpu_count() or 1
+        # Depth and budget options are read here too, so the depth is chosen the way ChessAI does
+        self.endgame_depth = ai_options.get('endgame_depth', ENDGAME_DEPTH)
+        self.time_limit = ai_options.get('time_limit')
+        self.node_limit = ai_options.get('node_limit')
+        self.calculations = 0
+        self.cutoffs = 0
+        self.depth_reached = 0
+        self.current_depth = 0
+        self.best_score = None
+        # Statistics of every move go to these sinks, like ChessAI's (the workers report nothing)
+        self.sinks = []
+        self.verbose = True
+        self.last_stats = None
+        self.last_pv = []  # Only the move itself: the rest of the line is not known here
+        self.stats_gate = None  # As ChessAI's
+        self._search_start = None
+        # Root moves are ordered here; the workers order their own subtrees
+        self.move_orderer = MoveOrderer()
+        self._ai_options = ai_options
+        self._alpha = multiprocessing.Value('d', -math.inf)
+        self._stop = multiprocessing.Event()
+        self._executor = self._start_pool()
+
+    def _start_pool(self):
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.color, self._ai_options, self._alpha, self._stop))
+
+    def get_best_move(self, board, depth=None, time_limit=None, node_limit=None, stop_event=None):
+        """Find the best move, searching root moves on all workers.
+
+        The depth is chosen as by ChessAI: a fixed depth (endgame_depth in
+        endgames), or with a time and/or node budget one ply at a time up to
+        `depth`, keeping the best move of the deepest finished iteration.
+        """
+        if time_limit is None:
+            time_limit = self.time_limit
+        if node_limit is None:
+            node_limit = self.node_limit
+        self._start_search()
+        if self.tablebase is not None:
+            result = self.tablebase.root_move(board)
+            if result is not None:
+                self._report(board, result[0], 'tablebase')
+                return result[0]
+
+        moves = self.move_orderer.order(board, board.legal_moves, 0)
+        if not moves:
+            return None
+        for move in moves:
+            board.push(move)
+            mate = board.is_checkmate()
+            board.pop()
+            if mate:
+                self.best_score = MATE_SCORE - 1
+                self.depth_reached = 1
+                self._report(board, move, 'search')
+                return move
+
+        if time_limit is None and node_limit is None:
+            depths = [fixed_depth(board, depth, self.endgame_depth, self.tablebase)]
+        else:
+            depths = range(1, (depth or MAX_DEPTH) + 1)
+        deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        best_move = None
+        for current in depths:
+            self.current_depth = current
+            move, score, finished = self._search_depth(board, moves, current, stop_event, deadline, node_limit)
+            if not finished:
+                if best_move is None:
+                    best_move = move  # Best of the moves this iteration got through
+                break
+            best_move = move
+            self.best_score = score
+            self.depth_reached = current
+            if score is not None and score >= MATE_BOUND:
+                break  # Forced mate found, no need to look deeper
+            # The next iteration starts with this iteration's best move
+            moves.remove(move)
+            moves.insert(0, move)
+        # As ChessAI: a search stopped from outside is thrown away
+        if stop_event is None or not stop_event.is_set():
+            self._report(board, best_move, 'search')
+        return best_move
+
+    def _search_depth(self, board, moves, depth, stop_event, deadline, node_limit):
+        """Search every root move to depth; returns (best move, its score, whether all moves finished)."""
+        self._alpha.value = -math.inf
+        self._stop.clear()
+        results = [None] * len(moves)
+        root = board.copy()
+        tasks = list(enumerate(moves))
+        # Eldest brother first, so the others start with a real alpha bound
+        finished = self._run_tasks(root, tasks[:1], depth, results, stop_event, deadline, node_limit)
+        if finished:
+            finished = self._run_tasks(root, tasks[1:], depth, results, stop_event, deadline, node_limit)
+        return self._pick(moves, results) + (finished,)
+
+    def _start_search(self):
+        self.calculations = 0
+        self.cutoffs = 0
+        self.depth_reached = 0
+        self.best_score = None
+        self._search_start = time.perf_counter()
+
+    def _report(self, board, move, source):
+        """Send the statistics of this move to the sinks, the same way ChessAI does."""
+        self.last_pv = [move] if move is not None else []
+        sinks = list(self.sinks)
+        if self.verbose:
+            sinks.append(ConsoleSink())
+        if not sinks:
+            self.last_stats = None
+            return
+        stats = SearchStats(board.fen(), board.turn, move, source)
+        stats.score = self.best_score
+        stats.depth = self.depth_reached
+        stats.nodes = self.calculations
+        stats.time = time.perf_counter() - self._search_start
+        stats.cutoffs = self.cutoffs
+        stats.pv = [pv_move.uci() for pv_move in self.last_pv]
+        publish(self, stats, sinks)
+
+    def _run_tasks(self, root, tasks, depth, results, stop_event, deadline=None, node_limit=None):
+        """Search the (index, move) tasks into results, at most one per worker at a time.
+
+        Returns False if the search was stopped or ran out of budget. The
+        node budget left is shared among the free workers when a task is
+        submitted, so the tasks in flight never have more than that between
+        them; every task's nodes are counted, also those of aborted tasks.
+        """
+        waiting = list(tasks)
+        pending = {}  # future -> (index, node budget)
+        while waiting or pending:
+            while waiting and len(pending) < self.workers:
+                budget = None
+                if node_limit is not None:
+                    left = node_limit - self.calculations - sum(budget for _, budget in pending.values())
+                    if left <= 0:
+                        break  # Wait for the tasks in flight to give back what they did not use
+                    budget = max(1, left // (self.workers - len(pending)))
+                index, move = waiting.pop(0)
+                future = self._executor.submit(_search_move, root, move, depth, budget)
+                pending[future] = index, budget
+            done, _ = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, _ = pending.pop(future)
+                self._collect(future, index, results)
+            if ((stop_event is not None and stop_event.is_set()) or
+                    (deadline is not None and time.perf_counter() >= deadline) or
+                    (node_limit is not None and self.calculations >= node_limit)):
+                # The workers check the shared stop event while they search
+                self._stop.set()
+                for future in pending:
+                    future.cancel()
+                wait(pending)
+                for future, (index, _) in pending.items():
+                    if not future.cancelled():
+                        self._collect(future, index, results)
+                return False
+        return True
+
+    def _collect(self, future, index, results):
+        score, exact, nodes, cutoffs = future.result()
+        self.calculations += nodes
+        self.cutoffs += cutoffs
+        if score is not None:
+            results[index] = score, exact
+
+    def _pick(self, moves, results):
+        """(move, score): highest exact score wins; ties go to the move ordered first."""
+        best_index = None
+        for index, result in enumerate(results):
+            if result is None or not result[1]:
+                continue
+            if best_index is None or result[0] > results[best_index][0]:
+                best_index = index
+        if best_index is None:
+            return moves[0], None
+        return moves[best_index], results[best_index][0]
+
+    def progress(self):
+        return {
+            'depth': self.depth_reached,
+            'current_depth': self.current_depth,
+            'nodes': self.calculations
+        }
+
+    def principal_variation(self, board, max_length=None):
+        """Not available: the positions searched are in the workers' tables."""
+        return []
+
+    def choose_move(self, board, stop_event=None):
+        """Choose a move for the AI: from the opening book if possible, otherwise by search."""
+        if self.book is not None:
+            move = self.book.choose(board)
+            if move is not None:
+                self._start_search()
+                self._report(board, move, 'book')
+                return move
+        return self.get_best_move(board, stop_event=stop_event)
+
+    def reset(self):
+        """New game: restart the workers so their tables are empty."""
+        self.move_orderer.reset()
+        self.close()
+        self._executor = self._start_pool()
+
+    def close(self):
+        self._stop.set()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,127 @@
+"""Opt-in timers for the render loop, shown as an overlay.
+
+Enabled with the CHESS_PROFILE=1 environment variable or the 'p' key.
+While disabled, section() returns a shared do-nothing context manager.
+"""
+import os
+import time
+from collections import deque
+
+# Environment variable that turns profiling on at startup
+PROFILE_ENV = 'CHESS_PROFILE'
+# Where 'm' writes the cProfile dump of the next AI move (default: current directory)
+PROFILE_DIR_ENV = 'CHESS_PROFILE_DIR'
+
+# Upper edges of the frame-time histogram buckets, in milliseconds
+FRAME_BUCKETS_MS = (4, 8, 16, 33, 50)
+# The overlay text changes at most this often, so it stays readable
+OVERLAY_REFRESH = 0.5
+
+
+class _Disabled:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_DISABLED = _Disabled()
+
+
+class _Section:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+class Profiler:
+    """Rolling timings of named sections and of whole frames."""
+
+    def __init__(self, enabled=False, window=240):
+        self.enabled = enabled
+        self.window = window
+        self.sections = {}  # name -> recent durations in ms
+        self.frames = deque(maxlen=window)
+        self._frame_start = None
+        self._lines = []
+        self._lines_time = 0.0
+
+    @classmethod
+    def from_env(cls):
+        return cls(enabled=os.environ.get(PROFILE_ENV, '') not in ('', '0'))
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.sections.clear()
+        self.frames.clear()
+        self._frame_start = None
+        self._lines = []
+
+    def section(self, name):
+        """Context manager timing one call: `with profiler.section('show_bg'): ...`."""
+        if not self.enabled:
+            return _DISABLED
+        return _Section(self, name)
+
+    def record(self, name, ms):
+        if name not in self.sections:
+            self.sections[name] = deque(maxlen=self.window)
+        self.sections[name].append(ms)
+
+    def frame_start(self):
+        if self.enabled:
+            self._frame_start = time.perf_counter()
+
+    def frame_end(self):
+        """End of the frame's work (before waiting for the next frame or event)."""
+        if self.enabled and self._frame_start is not None:
+            self.frames.append((time.perf_counter() - self._frame_start) * 1000)
+            self._frame_start = None
+
+    def histogram(self):
+        """Frame counts per bucket, as (label, count); the last bucket is open-ended."""
+        counts = [0] * (len(FRAME_BUCKETS_MS) + 1)
+        for ms in self.frames:
+            index = 0
+            while index < len(FRAME_BUCKETS_MS) and ms > FRAME_BUCKETS_MS[index]:
+                index += 1
+            counts[index] += 1
+        labels = [f"<{edge}" for edge in FRAME_BUCKETS_MS] + [f">{FRAME_BUCKETS_MS[-1]}"]
+        return list(zip(labels, counts))
+
+    def lines(self):
+        """Overlay text: average section times and the frame-time histogram."""
+        if not self.enabled:
+            return []
+        now = time.perf_counter()
+        if now - self._lines_time < OVERLAY_REFRESH:
+            return self._lines
+        self._lines_time = now
+
+        lines = []
+        if self.frames:
+            ordered = sorted(self.frames)
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            lines.append(f"frame {sum(ordered) / len(ordered):.1f} ms avg, {p95:.1f} ms p95")
+            total = len(ordered)
+            lines.append("ms " + "  ".join(f"{label}:{'#' * round(8 * count / total)}"
+                                           for label, count in self.histogram()))
+        for name, durations in sorted(self.sections.items()):
+            lines.append(f"{name} {sum(durations) / len(durations):.2f} ms avg, {max(durations):.2f} ms max")
+        self._lines = lines
+        return lines
+
+
+def profile_path(prefix='ai_move'):
+    """File name for a cProfile dump, in CHESS_PROFILE_DIR or the current directory."""
+    directory = os.environ.get(PROFILE_DIR_ENV, '.')
+    return os.path.join(directory, f"{prefix}_{time.strftime('%Y%m%d_%H%M%S')}.prof")
@@ -0,0 +1,360 @@
+"""Compact binary game records: a streaming writer, a memory-mapped reader and PGN converters.
+
+    python src/records.py info games.cgr
+    python src/records.py export games.cgr --output games.pgn
+    python src/records.py import games.pgn more.pgn --output games.cgr
+
+A file is a small header followed by one record per game. A record is a
+fixed header (length, result, players, settings, move count), the start
+FEN when it is not the standard one, the player names when they are not
+'human' and 'ai' (imported games), one 16-bit word per move and,
+optionally, the AI statistics of every move. The length in front of each
+record lets the reader skip from game to game without decoding moves.
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from collections import namedtuple
+
+import chess
+import chess.pgn
+
+# Default file the game appends finished games to: in the project directory, not wherever the game was started
+DEFAULT_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'games.cgr'))
+
+FILE_HEADER = struct.Struct('<4sH')  # magic, version
+MAGIC = b'CHGR'
+VERSION = 1
+
+# Record length in bytes, result, flags, white player, black player, AI workers,
+# AI time limit in ms (0 = none), end time (Unix seconds), move count, FEN length
+RECORD_HEADER = struct.Struct('<IBBBBBIIHH')
+# Per move: score (centipawns, mover's view), nodes, time in ms, depth, source
+MOVE_STATS = struct.Struct('<hIIBB')
+
+RESULTS = ('*', '1-0', '0-1', '1/2-1/2')
+PLAYERS = ('human', 'ai')
+# Where a move came from; 0 = no statistics (a human move, or the AI reported none)
+SOURCES = (None, 'search', 'book', 'tablebase')
+
+FLAG_STATS = 1  # Per-move statistics follow the moves
+FLAG_NAMES = 2  # Player names (one length byte + UTF-8 each) follow the FEN
+
+MoveStats = namedtuple('MoveStats', 'score nodes time depth source')
+
+
+def encode_move(move):
+    """16 bits: to square, from square, promotion piece type (0 = none; the null move is 0)."""
+    return move.to_square | (move.from_square << 6) | ((move.promotion or 0) << 12)
+
+
+def decode_move(value):
+    if value == 0:
+        return chess.Move.null()
+    return chess.Move(value >> 6 & 63, value & 63, value >> 12 or None)
+
+
+def move_stats_from_search(stats):
+    """MoveStats from a telemetry SearchStats (None stays None)."""
+    if stats is None:
+        return None
+    return MoveStats(stats.score or 0, stats.nodes, stats.time, stats.depth, stats.source)
+
+
+class GameRecord:
+    """One stored game: moves from a start position, the result and how it was played."""
+
+    def __init__(self, moves, result='*', fen=None, white='human', black='human', workers=1,
+                 time_limit=None, end_time=None, stats=None):
+        self.moves = list(moves)
+        self.result = result
+        self.fen = fen  # None = standard start position
+        # 'human', 'ai', or a player's name (games imported from PGN)
+        self.white = white
+        self.black = black
+        self.workers = workers
+        self.time_limit = time_limit  # AI seconds per move (None = fixed depth)
+        self.end_time = int(end_time if end_time is not None else time.time())
+        # One MoveStats or None per move (None = no statistics at all)
+        self.stats = list(stats) if stats is not None else None
+
+    @classmethod
+    def from_board(cls, board, **settings):
+        """Record the game played on a chess.Board (its whole move stack)."""
+        start = board.root()
+        fen = None if start.fen() == chess.STARTING_FEN else start.fen()
+        return cls(board.move_stack, board.result(), fen, **settings)
+
+    @classmethod
+    def from_pgn(cls, game):
+        """Record a chess.pgn.Game (main line only, with the White and Black names)."""
+        board = game.board()
+        fen = None if board.fen() == chess.STARTING_FEN else board.fen()
+        result = game.headers.get('Result', '*')
+        return cls(game.mainline_moves(), result if result in RESULTS else '*', fen,
+                   white=game.headers.get('White', '?'), black=game.headers.get('Black', '?'))
+
+    def board(self):
+        """The start position."""
+        return chess.Board(self.fen) if self.fen else chess.Board()
+
+    def replay(self):
+        """Yield (board, move) before every move; the same board object is updated in place."""
+        board = self.board()
+        for move in self.moves:
+            yield board, move
+            board.push(move)
+
+    def final_board(self):
+        board = self.board()
+        for move in self.moves:
+            board.push(move)
+        return board
+
+    def to_pgn(self):
+        """A chess.pgn.Game with the moves, result and AI scores as comments."""
+        game = chess.pgn.Game()
+        if self.fen:
+            game.setup(self.fen)
+        game.headers['Result'] = self.result
+        game.headers['White'] = self.white
+        game.headers['Black'] = self.black
+        game.headers['Date'] = time.strftime('%Y.%m.%d', time.localtime(self.end_time))
+        node = game
+        for index, move in enumerate(self.moves):
+            node = node.add_variation(move)
+            stats = self.stats[index] if self.stats else None
+            if stats is not None:
+                node.comment = f"{stats.source} score {stats.score} depth {stats.depth} nodes {stats.nodes}"
+        return game
+
+    def pack(self):
+        fen = self.fen.encode('ascii') if self.fen else b''
+        flags = FLAG_STATS if self.stats is not None else 0
+        body = [fen]
+        if self.white not in PLAYERS or self.black not in PLAYERS:
+            flags |= FLAG_NAMES
+            body += [_pack_name(self.white), _pack_name(self.black)]
+        body.append(struct.pack(f'<{len(self.moves)}H', *map(encode_move, self.moves)))
+        if self.stats is not None:
+            for stats in self.stats:
+                if stats is None:
+                    body.append(MOVE_STATS.pack(0, 0, 0, 0, 0))
+                else:
+                    body.append(MOVE_STATS.pack(
+                        max(-32767, min(32767, int(stats.score))), min(stats.nodes, 0xFFFFFFFF),
+                        min(int(stats.time * 1000), 0xFFFFFFFF), min(stats.depth, 255),
+                        SOURCES.index(stats.source)))
+        body = b''.join(body)
+        header = RECORD_HEADER.pack(
+            RECORD_HEADER.size + len(body), RESULTS.index(self.result), flags,
+            _player_index(self.white), _player_index(self.black), min(self.workers, 255),
+            int(self.time_limit * 1000) if self.time_limit else 0, self.end_time,
+            len(self.moves), len(fen))
+        return header + body
+
+
+class GameWriter:
+    """Appends games to a records file, one complete record per write().
+
+    Opening an existing file walks its record headers once to drop a torn
+    last record, so keep one writer open for many games. Raises ValueError
+    if the file is not a records file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            # A record cut short by a crash is dropped, so new games start on a record boundary
+            valid = _valid_length(path)
+            self._file = open(path, 'r+b')
+            self._file.truncate(valid)
+            self._file.seek(valid)
+        else:
+            self._file = open(path, 'wb')
+            self._file.write(FILE_HEADER.pack(MAGIC, VERSION))
+            self._file.flush()
+
+    def write(self, record):
+        self._file.write(record.pack())
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class GameReader:
+    """Reads a records file through a memory map; only the pages touched are read from disk.
+
+    Iterating decodes every game. headers() and results() only read the
+    fixed record headers, so they scan even very large files quickly.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        _check_header(self._data, path)
+
+    def offsets(self):
+        """Start offset of every complete record."""
+        return _record_offsets(self._data)
+
+    def headers(self):
+        """Yield (offset, header tuple) of every game without decoding its moves."""
+        for offset in self.offsets():
+            yield offset, RECORD_HEADER.unpack_from(self._data, offset)
+
+    def results(self):
+        """Number of games per result."""
+        counts = dict.fromkeys(RESULTS, 0)
+        for _, header in self.headers():
+            counts[RESULTS[header[1]]] += 1
+        return counts
+
+    def read(self, offset):
+        """Decode the game stored at offset."""
+        data = self._data
+        (_, result, flags, white, black, workers, time_limit, end_time,
+         move_count, fen_length) = RECORD_HEADER.unpack_from(data, offset)
+        position = offset + RECORD_HEADER.size
+        fen = data[position:position + fen_length].decode('ascii') if fen_length else None
+        position += fen_length
+        white, black = PLAYERS[white], PLAYERS[black]
+        if flags & FLAG_NAMES:
+            white, position = _unpack_name(data, position)
+            black, position = _unpack_name(data, position)
+        moves = [decode_move(value) for value in struct.unpack_from(f'<{move_count}H', data, position)]
+        position += 2 * move_count
+        stats = None
+        if flags & FLAG_STATS:
+            stats = []
+            for score, nodes, ms, depth, source in MOVE_STATS.iter_unpack(
+                    data[position:position + MOVE_STATS.size * move_count]):
+                stats.append(MoveStats(score, nodes, ms / 1000, depth, SOURCES[source]) if source else None)
+        return GameRecord(moves, RESULTS[result], fen, white, black, workers,
+                          time_limit / 1000 if time_limit else None, end_time, stats)
+
+    def __iter__(self):
+        for offset in self.offsets():
+            yield self.read(offset)
+
+    def close(self):
+        self._data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _player_index(player):
+    # A named player is stored as a name after the FEN; the header byte is unused then
+    return PLAYERS.index(player) if player in PLAYERS else 0
+
+
+def _pack_name(name):
+    data = name.encode('utf-8')[:255]
+    return bytes([len(data)]) + data
+
+
+def _unpack_name(data, position):
+    length = data[position]
+    # 'ignore': a name cut at 255 bytes may end in half a character
+    return data[position + 1:position + 1 + length].decode('utf-8', 'ignore'), position + 1 + length
+
+
+def _record_offsets(data):
+    offset = FILE_HEADER.size
+    end = len(data)
+    while offset + RECORD_HEADER.size <= end:
+        length = struct.unpack_from('<I', data, offset)[0]
+        if length < RECORD_HEADER.size or offset + length > end:
+            break  # Incomplete last record
+        yield offset
+        offset += length
+
+
+def _check_header(data, path):
+    if len(data) < FILE_HEADER.size or FILE_HEADER.unpack_from(data, 0)[0] != MAGIC:
+        raise ValueError(f"{path} is not a game records file")
+    version = FILE_HEADER.unpack_from(data, 0)[1]
+    if version != VERSION:
+        raise ValueError(f"{path}: unsupported records version {version}")
+
+
+def _valid_length(path):
+    """Length of a records file up to the end of its last complete record."""
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        _check_header(data, path)
+        end = FILE_HEADER.size
+        for offset in _record_offsets(data):
+            end = offset + struct.unpack_from('<I', data, offset)[0]
+        return end
+
+
+def import_pgn(pgn_paths, output_path):
+    """Append every game of the PGN files to a records file; returns the number of games."""
+    count = 0
+    with GameWriter(output_path) as writer:
+        for path in pgn_paths:
+            with open(path, encoding='utf-8', errors='replace') as f:
+                while True:
+                    game = chess.pgn.read_game(f)
+                    if game is None:
+                        break
+                    writer.write(GameRecord.from_pgn(game))
+                    count += 1
+    return count
+
+
+def export_pgn(records_path, output_path):
+    """Write every stored game to a PGN file; returns the number of games."""
+    count = 0
+    with GameReader(records_path) as reader, open(output_path, 'w', encoding='utf-8') as out:
+        for record in reader:
+            print(record.to_pgn(), file=out, end='\n\n')
+            count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Binary game records tools")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    info = commands.add_parser('info', help="count the games and results of a records file")
+    info.add_argument('records')
+
+    export = commands.add_parser('export', help="convert a records file to PGN")
+    export.add_argument('records')
+    export.add_argument('--output', required=True, help="PGN file to write")
+
+    imports = commands.add_parser('import', help="append the games of PGN files to a records file")
+    imports.add_argument('pgn', nargs='+', help="PGN files")
+    imports.add_argument('--output', required=True, help="records file to append to")
+
+    args = parser.parse_args(argv)
+    if args.command == 'info':
+        with GameReader(args.records) as reader:
+            results = reader.results()
+        print(f"{sum(results.values())} games: " + ", ".join(f"{result} {count}" for result, count in results.items()))
+    elif args.command == 'export':
+        print(f"Exported {export_pgn(args.records, args.output)} games to {args.output}")
+    elif args.command == 'import':
+        print(f"Imported {import_pgn(args.pgn, args.output)} games into {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+import cProfile
+import threading
+
+from telemetry import StatsGate
+
+
+class SearchWorker:
+    """Runs the AI search on a background thread.
+
+    The main loop starts a search with start(), keeps rendering, and calls
+    poll() every frame until the move is ready. cancel() stops a running
+    search and throws its result away. If the search raises, poll()
+    raises that error once and the worker is idle again.
+
+    ponder() searches the position after the expected reply while the
+    opponent thinks. If start() is then called on that same position (a
+    ponder hit), the running or finished search becomes the answer;
+    otherwise it is thrown away and a new search starts. The statistics of
+    a ponder search only reach the AI's sinks on a ponder hit.
+    """
+
+    def __init__(self, ai):
+        self.ai = ai
+        self._thread = None
+        self._stop_event = None
+        self._result = None
+        self._error = None
+        self._finished = False
+        self._ponder_fen = None  # Position searched by the ponder search (None = not pondering)
+        self._stats_gate = None  # Holds the ponder search's statistics until a hit
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+        self._profile_path = None  # cProfile dump of the next search goes here
+
+    def ponder(self, board, expected_move):
+        """Search the position after expected_move in the background."""
+        self.cancel()
+        board = board.copy()
+        board.push(expected_move)
+        self._stats_gate = StatsGate()
+        self.ai.stats_gate = self._stats_gate
+        self._start_thread(board)
+        self._ponder_fen = board.fen()
+
+    def is_ponder_hit(self, board):
+        """True if the ponder search is working on this position."""
+        return self._ponder_fen is not None and self._ponder_fen == board.fen()
+
+    @property
+    def ponder_hit_rate(self):
+        total = self.ponder_hits + self.ponder_misses
+        return self.ponder_hits / total if total else 0.0
+
+    def start(self, board):
+        """Start searching a copy of the board; the real board stays untouched."""
+        if self._ponder_fen is not None:
+            if self.is_ponder_hit(board):
+                # Keep the ponder search: it is searching exactly this position
+                self.ponder_hits += 1
+                self._ponder_fen = None
+                self._stats_gate.open()
+                return
+            self.ponder_misses += 1
+        self.cancel()
+        self._start_thread(board)
+
+    def _start_thread(self, board):
+        self._stop_event = threading.Event()
+        self._result = None
+        self._error = None
+        self._finished = False
+        self._thread = threading.Thread(
+            target=self._run, args=(board.copy(), self._stop_event), daemon=True)
+        self._thread.start()
+
+    def profile_next_move(self, path):
+        """Run the next search under cProfile and write the stats to path."""
+        self._profile_path = path
+
+    def _run(self, board, stop_event):
+        try:
+            move = self._choose_move(board, stop_event)
+        except Exception as error:
+            # Handed to poll(), so a failed search (e.g. a lost engine service) does not leave the worker busy
+            if not stop_event.is_set():
+                self._error = error
+                self._finished = True
+            return
+        if not stop_event.is_set():
+            self._result = move
+            self._finished = True
+
+    def _choose_move(self, board, stop_event):
+        path, self._profile_path = self._profile_path, None
+        if path is None:
+            return self.ai.choose_move(board, stop_event=stop_event)
+        # cProfile only sees the thread that enables it, so profile here
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            return self.ai.choose_move(board, stop_event=stop_event)
+        finally:
+            profile.disable()
+            profile.dump_stats(path)
+            print(f"[Profile] AI move profile written to {path}")
+
+    @property
+    def busy(self):
+        """True from start() until the result has been collected with poll() (not while pondering)."""
+        return self._thread is not None and self._ponder_fen is None
+
+    @property
+    def pondering(self):
+        return self._ponder_fen is not None
+
+    def poll(self):
+        """Return the chosen move once, when the search has finished; otherwise None.
+
+        Raises the search's exception instead if it failed.
+        """
+        if not self._finished or self._ponder_fen is not None:
+            return None
+        move, error = self._result, self._error
+        self._result = None
+        self._error = None
+        self._finished = False
+        self._thread = None
+        if error is not None:
+            raise error
+        return move
+
+    def progress(self):
+        """Depth reached and nodes searched so far by the running search."""
+        return self.ai.progress()
+
+    def cancel(self):
+        """Stop the running search (if any) and wait for the thread to exit."""
+        if self._stop_event is not None:
+            self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._stats_gate is not None:
+            self._stats_gate.drop()
+            self._stats_gate = None
+            self.ai.stats_gate = None
+        self._thread = None
+        self._stop_event = None
+        self._result = None
+        self._error = None
+        self._finished = False
+        self._ponder_fen = None
@@ -0,0 +1,559 @@
+"""Engine service: many games against the AI over one local socket, searched on a shared process pool.
+
+    python src/service.py --port 8765 --workers 4
+    python src/service.py --unix /tmp/chess.sock --time-limit 0.5 --metrics-interval 10
+
+Clients send one JSON object per line and get one JSON line back per
+request, carrying the request's "id" (requests of one connection may be
+answered out of order). Operations:
+
+    {"op": "new", "fen": "...", "time_limit": 1.0, "depth": 6}  -> {"session": 1, "fen": "..."}
+    {"op": "push", "session": 1, "moves": ["e2e4"]}             -> {"fen": "..."}
+    {"op": "go", "session": 1}          AI moves for the side to move -> {"move": "e7e5", "score": ..., ...}
+    {"op": "play", "session": 1, "move": "e2e4"}   push, then go unless the game is over
+    {"op": "state", "session": 1}       -> {"fen": "...", "moves": [...], "result": "*"}
+    {"op": "close", "session": 1}
+    {"op": "metrics"}                   -> queue depth, latency percentiles, throughput
+
+Errors come back as {"id": ..., "error": "..."}. Sessions belong to the
+connection that created them and are closed when it disconnects.
+"""
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import socket
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import chess
+
+from ai import ChessAI, mate_distance, score_to_centipawns
+from telemetry import ConsoleSink, SearchStats, publish
+
+DEFAULT_PORT = 8765
+# Searches that may wait for a worker before new ones are refused
+DEFAULT_MAX_QUEUE = 256
+# Per-session search time, and the most a session may ask for (seconds)
+DEFAULT_TIME_LIMIT = 1.0
+MAX_TIME_LIMIT = 10.0
+# Searches kept for the latency percentiles, and the throughput window (seconds)
+METRICS_WINDOW = 1000
+THROUGHPUT_WINDOW = 60.0
+
+# Worker state: one warm AI per color, kept between searches of all sessions
+_engines = {}
+
+
+def _engine_for(color):
+    if color not in _engines:
+        ai = ChessAI(color)
+        ai.verbose = False
+        _engines[color] = ai
+    return _engines[color]
+
+
+def _search(fen, moves, time_limit, depth):
+    """Pool task: search the position after the moves for the side to move."""
+    board = chess.Board(fen)
+    for move in moves:
+        board.push_uci(move)
+    ai = _engine_for(board.turn)
+    start = time.perf_counter()
+    move = ai.get_best_move(board, depth=depth, time_limit=time_limit, iterative=True)
+    return {
+        'move': move.uci() if move else None,
+        'score': ai.best_score,
+        'depth': ai.depth_reached,
+        'nodes': ai.calculations,
+        'time': time.perf_counter() - start
+    }
+
+
+class ServiceBusy(Exception):
+    """The search queue is full."""
+
+
+class ServiceError(Exception):
+    """Error reply from the service (raised by ServiceClient)."""
+
+
+class Session:
+    """One game: its board, search settings and the pool time it has used."""
+
+    def __init__(self, session_id, board, time_limit, depth, pool_time):
+        self.id = session_id
+        self.board = board
+        self.time_limit = time_limit
+        self.depth = depth
+        self.pool_time = pool_time
+        self.closed = False
+        # One operation at a time, so moves and searches stay in order
+        self.lock = asyncio.Lock()
+
+
+class _Job:
+    def __init__(self, session, args, future):
+        self.session = session
+        self.args = args
+        self.future = future
+        self.enqueued = time.perf_counter()
+
+
+class FairScheduler:
+    """Hands searches to the pool, at most one per worker, fairest session first.
+
+    When a worker frees up, the waiting search whose session has used the
+    least pool time goes next (oldest first on ties), so sessions with
+    long time limits cannot starve sessions that need quick replies. The
+    pool's own queue stays empty; waiting searches are kept here, at most
+    max_queue of them.
+    """
+
+    def __init__(self, executor, workers, max_queue, metrics):
+        self.executor = executor
+        self.workers = workers
+        self.max_queue = max_queue
+        self.metrics = metrics
+        self.waiting = []
+        self.running = 0
+
+    async def search(self, session, *args):
+        if len(self.waiting) >= self.max_queue:
+            self.metrics.rejected += 1
+            raise ServiceBusy("search queue is full")
+        job = _Job(session, args, asyncio.get_running_loop().create_future())
+        self.waiting.append(job)
+        self._dispatch()
+        return await job.future
+
+    def cancel(self, session):
+        """Drop the session's waiting searches (running ones finish and are ignored)."""
+        for job in [job for job in self.waiting if job.session is session]:
+            self.waiting.remove(job)
+            job.future.cancel()
+
+    def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while self.running < self.workers and self.waiting:
+            job = min(self.waiting, key=lambda job: (job.session.pool_time, job.enqueued))
+            self.waiting.remove(job)
+            self.running += 1
+            started = time.perf_counter()
+            pool_future = loop.run_in_executor(self.executor, _search, *job.args)
+            pool_future.add_done_callback(lambda future, job=job, started=started: self._done(job, started, future))
+
+    def _done(self, job, started, pool_future):
+        self.running -= 1
+        finished = time.perf_counter()
+        job.session.pool_time += finished - started
+        if pool_future.cancelled():
+            job.future.cancel()
+        elif pool_future.exception() is not None:
+            # E.g. BrokenProcessPool: the request gets an error reply
+            if not job.future.done():
+                job.future.set_exception(pool_future.exception())
+        else:
+            result = pool_future.result()
+            self.metrics.record(started - job.enqueued, finished - job.enqueued, result['nodes'])
+            if not job.future.done():
+                job.future.set_result(result)
+        self._dispatch()
+
+
+def _percentiles(values):
+    ordered = sorted(values)
+    if not ordered:
+        return {'p50': None, 'p90': None, 'p99': None}
+    return {name: round(1000 * ordered[min(len(ordered) - 1, int(len(ordered) * fraction))], 2)
+            for name, fraction in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99))}
+
+
+class Metrics:
+    """Search counts, recent latencies (ms) and throughput over the last minute."""
+
+    def __init__(self, window=METRICS_WINDOW):
+        self.completed = 0
+        self.rejected = 0
+        self.waits = deque(maxlen=window)
+        self.latencies = deque(maxlen=window)
+        self._recent = deque()  # (finish time, nodes) within THROUGHPUT_WINDOW
+        self.started = time.perf_counter()
+
+    def record(self, wait, latency, nodes):
+        now = time.perf_counter()
+        self.completed += 1
+        self.waits.append(wait)
+        self.latencies.append(latency)
+        self._recent.append((now, nodes))
+        self._trim(now)
+
+    def _trim(self, now):
+        while self._recent and now - self._recent[0][0] > THROUGHPUT_WINDOW:
+            self._recent.popleft()
+
+    def snapshot(self, scheduler, sessions):
+        now = time.perf_counter()
+        self._trim(now)
+        window = min(THROUGHPUT_WINDOW, now - self.started) or 1e-9
+        return {
+            'sessions': sessions,
+            'queue_depth': len(scheduler.waiting),
+            'running': scheduler.running,
+            'workers': scheduler.workers,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'latency_ms': _percentiles(self.latencies),
+            'wait_ms': _percentiles(self.waits),
+            'searches_per_second': round(len(self._recent) / window, 3),
+            'nodes_per_second': round(sum(nodes for _, nodes in self._recent) / window)
+        }
+
+
+class EngineService:
+    """Sessions and their searches; serve() listens for JSON-lines clients."""
+
+    def __init__(self, workers=1, max_queue=DEFAULT_MAX_QUEUE, time_limit=DEFAULT_TIME_LIMIT,
+                 max_time_limit=MAX_TIME_LIMIT):
+        self.workers = workers
+        self.time_limit = time_limit
+        self.max_time_limit = max_time_limit
+        self.sessions = {}
+        self._ids = itertools.count(1)
+        self.metrics = Metrics()
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.scheduler = FairScheduler(self.executor, workers, max_queue, self.metrics)
+
+    async def serve(self, host='127.0.0.1', port=DEFAULT_PORT, unix_path=None, metrics_interval=None):
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle_connection, path=unix_path)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Engine service on {unix_path or f'{host}:{port}'} with {self.workers} workers")
+        async with server:
+            if metrics_interval:
+                asyncio.create_task(self._print_metrics(metrics_interval))
+            await server.serve_forever()
+
+    async def _print_metrics(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            print(json.dumps(self.metrics.snapshot(self.scheduler, len(self.sessions))), flush=True)
+
+    async def handle_connection(self, reader, writer):
+        owned = set()
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                # Every request runs on its own, so a slow search does not hold up other sessions
+                task = asyncio.create_task(self._respond(line, writer, owned))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except ConnectionError:
+            pass
+        finally:
+            for session_id in list(owned):
+                self._close_session(session_id)
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def _respond(self, line, writer, owned):
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("a request must be a JSON object")
+            request_id = request.get('id')
+            reply = await self.handle_request(request, owned)
+        except Exception as error:
+            # Every request gets a reply, or its client would wait forever
+            reply = {'error': f"{type(error).__name__}: {error}"}
+        reply['id'] = request_id
+        if writer.is_closing():
+            return
+        writer.write((json.dumps(reply) + '\n').encode())
+        with contextlib.suppress(ConnectionError):
+            await writer.drain()
+
+    async def handle_request(self, request, owned=None):
+        op = request['op']
+        if op == 'metrics':
+            return self.metrics.snapshot(self.scheduler, len(self.sessions))
+        if op == 'new':
+            session = self._new_session(request)
+            if owned is not None:
+                owned.add(session.id)
+            return {'session': session.id, 'fen': session.board.fen()}
+
+        session = self.sessions.get(request['session'])
+        if session is None:
+            raise KeyError(f"no session {request['session']}")
+        if op == 'close':
+            self._close_session(session.id)
+            if owned is not None:
+                owned.discard(session.id)
+            return {'closed': session.id}
+        async with session.lock:
+            if op == 'state':
+                return self._state(session)
+            if op == 'push':
+                self._push(session, request['moves'])
+                return {'fen': session.board.fen()}
+            if op == 'play':
+                self._push(session, [request['move']])
+                if session.board.is_game_over():
+                    return self._state(session)
+                return await self._go(session)
+            if op == 'go':
+                return await self._go(session)
+        raise ValueError(f"unknown op {op!r}")
+
+    def _new_session(self, request):
+        board = chess.Board(request.get('fen') or chess.STARTING_FEN)
+        time_limit = request.get('time_limit')
+        time_limit = self.time_limit if time_limit is None else float(time_limit)
+        if not time_limit > 0:
+            raise ValueError(f"time_limit must be positive, not {time_limit}")
+        time_limit = min(time_limit, self.max_time_limit)
+        depth = request.get('depth')
+        if depth is not None and int(depth) <= 0:
+            raise ValueError(f"depth must be positive, not {depth}")
+        # A new session starts level with the least served one, not ahead of everybody
+        pool_time = min((session.pool_time for session in self.sessions.values()), default=0.0)
+        session = Session(next(self._ids), board, time_limit, int(depth) if depth else None, pool_time)
+        self.sessions[session.id] = session
+        return session
+
+    def _close_session(self, session_id):
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            session.closed = True
+            self.scheduler.cancel(session)
+
+    def _push(self, session, moves):
+        board = session.board
+        for uci in moves:
+            move = chess.Move.from_uci(uci)
+            if not board.is_legal(move):
+                raise ValueError(f"illegal move {uci} in {board.fen()}")
+            board.push(move)
+
+    async def _go(self, session):
+        board = session.board
+        if board.is_game_over():
+            raise ValueError("the game is over")
+        root = board.root()
+        result = await self.scheduler.search(
+            session, root.fen(), [move.uci() for move in board.move_stack], session.time_limit, session.depth)
+        if session.closed:
+            raise KeyError(f"session {session.id} was closed")
+        board.push_uci(result['move'])
+        score = result['score']
+        return {
+            'move': result['move'],
+            'score': score_to_centipawns(score) if score is not None else None,
+            'mate': mate_distance(score) if score is not None else None,
+            'depth': result['depth'],
+            'nodes': result['nodes'],
+            'time': result['time'],
+            'fen': board.fen(),
+            'result': board.result()
+        }
+
+    def _state(self, session):
+        board = session.board
+        return {'fen': board.fen(), 'moves': [move.uci() for move in board.move_stack], 'result': board.result()}
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+class ServiceClient:
+    """Blocking JSON-lines client. address is 'host:port' or 'unix:/path/to/socket'."""
+
+    def __init__(self, address):
+        self.address = address
+        self._sock = None
+        self._buffer = b''
+        self._ids = itertools.count(1)
+
+    def _connect(self):
+        if self.address.startswith('unix:'):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(self.address[len('unix:'):])
+        else:
+            host, port = self.address.rsplit(':', 1)
+            sock = socket.create_connection((host, int(port)))
+        sock.settimeout(0.05)  # Wake up regularly to look at the stop event
+        self._sock = sock
+        self._buffer = b''
+
+    def request(self, message, stop_event=None):
+        """Send one request and wait for its reply; None if stop_event was set first.
+
+        A stopped request leaves its reply on the way, so the connection
+        is dropped (and with it the sessions it created).
+        """
+        if self._sock is None:
+            self._connect()
+        request_id = next(self._ids)
+        self._sock.sendall((json.dumps(dict(message, id=request_id)) + '\n').encode())
+        while True:
+            line = self._read_line(stop_event)
+            if line is None:
+                self.close()
+                return None
+            reply = json.loads(line)
+            if reply.get('id') != request_id:
+                continue
+            if 'error' in reply:
+                raise ServiceError(reply['error'])
+            return reply
+
+    def _read_line(self, stop_event):
+        while b'\n' not in self._buffer:
+            if stop_event is not None and stop_event.is_set():
+                return None
+            try:
+                data = self._sock.recv(65536)
+            except socket.timeout:
+                continue
+            if not data:
+                self.close()
+                raise ConnectionError("the engine service closed the connection")
+            self._buffer += data
+        line, self._buffer = self._buffer.split(b'\n', 1)
+        return line
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+class RemoteAI:
+    """Plays through the engine service, with the choose_move interface of ChessAI.
+
+    The game is one service session; only the moves the service has not
+    seen yet are sent before each search. Used by the pygame client
+    through a SearchWorker like a local ChessAI.
+    """
+
+    def __init__(self, color, address, time_limit=None, depth=None):
+        self.color = color
+        self.client = ServiceClient(address)
+        self.time_limit = time_limit
+        self.depth = depth
+        self.calculations = 0
+        self.depth_reached = 0
+        self.current_depth = 0
+        self.best_score = None
+        # Statistics of every move go to these sinks, like ChessAI's
+        self.sinks = []
+        self.verbose = True
+        self.last_stats = None
+        self.last_pv = []  # Only the move itself: the rest of the line is not known here
+        self.stats_gate = None  # As ChessAI's
+        self._session = None
+        self._moves = []  # Moves the service's board has played
+
+    def choose_move(self, board, stop_event=None):
+        if self._session is None or board.move_stack[:len(self._moves)] != self._moves:
+            self._new_session(board)
+        pending = board.move_stack[len(self._moves):]
+        if pending:
+            self.client.request({'op': 'push', 'session': self._session, 'moves': [move.uci() for move in pending]})
+            self._moves.extend(pending)
+        reply = self.client.request({'op': 'go', 'session': self._session}, stop_event)
+        if reply is None:
+            self._session = None  # Dropped with the connection
+            return None
+        move = chess.Move.from_uci(reply['move'])
+        self._moves.append(move)
+        self.calculations = reply['nodes']
+        self.depth_reached = reply['depth']
+        self.best_score = reply['score']
+        self._report(board, move, reply['time'])
+        return move
+
+    def _report(self, board, move, seconds):
+        """Send the statistics the service returned to the sinks, the same way ChessAI does."""
+        self.last_pv = [move] if move is not None else []
+        sinks = list(self.sinks)
+        if self.verbose:
+            sinks.append(ConsoleSink())
+        if not sinks:
+            self.last_stats = None
+            return
+        stats = SearchStats(board.fen(), board.turn, move, 'search')
+        stats.score = self.best_score
+        stats.depth = self.depth_reached
+        stats.nodes = self.calculations
+        stats.time = seconds
+        stats.pv = [move.uci()]
+        publish(self, stats, sinks)
+
+    def _new_session(self, board):
+        self.reset()
+        root = board.root()
+        reply = self.client.request({'op': 'new', 'fen': root.fen(), 'time_limit': self.time_limit,
+                                     'depth': self.depth})
+        self._session = reply['session']
+        self._moves = []
+
+    def progress(self):
+        return {'depth': self.depth_reached, 'current_depth': self.current_depth, 'nodes': self.calculations}
+
+    def principal_variation(self, board, max_length=None):
+        """Not available: the search runs in the service."""
+        return []
+
+    def reset(self):
+        """New game: close the session (the next search starts another)."""
+        if self._session is not None:
+            with contextlib.suppress(ServiceError, OSError):
+                self.client.request({'op': 'close', 'session': self._session})
+        self._session = None
+        self._moves = []
+
+    def close(self):
+        self.reset()
+        self.client.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chess engine service for many concurrent games")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', help="listen on this Unix socket instead of TCP")
+    parser.add_argument('--workers', type=int, default=1, help="search processes shared by all sessions")
+    parser.add_argument('--max-queue', type=int, default=DEFAULT_MAX_QUEUE,
+                        help=f"waiting searches before new ones are refused (default {DEFAULT_MAX_QUEUE})")
+    parser.add_argument('--time-limit', type=float, default=DEFAULT_TIME_LIMIT,
+                        help=f"default seconds per search (default {DEFAULT_TIME_LIMIT})")
+    parser.add_argument('--max-time-limit', type=float, default=MAX_TIME_LIMIT,
+                        help=f"most seconds a session may ask for (default {MAX_TIME_LIMIT})")
+    parser.add_argument('--metrics-interval', type=float, help="print the metrics every this many seconds")
+    args = parser.parse_args(argv)
+
+    service = EngineService(args.workers, args.max_queue, args.time_limit, args.max_time_limit)
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.unix, args.metrics_interval))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
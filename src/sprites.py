@@ -0,0 +1,74 @@
+import os
+
+import chess
+import pygame
+
+# Asset sets shipped under assets/images/
+PIECE_SETS = ('80px', '128px')
+
+PIECE_NAMES = {
+    chess.PAWN: 'pawn',
+    chess.KNIGHT: 'knight',
+    chess.BISHOP: 'bishop',
+    chess.ROOK: 'rook',
+    chess.QUEEN: 'queen',
+    chess.KING: 'king'
+}
+
+IMAGES_PATH = os.path.join(os.path.dirname(__file__), '..', 'assets', 'images')
+
+
+class SpriteCache:
+    """Piece images decoded once and pre-scaled to the square size.
+
+    The images are only reloaded when the square size or the piece set
+    changes.
+    """
+
+    def __init__(self, piece_set='80px', size=80):
+        if piece_set not in PIECE_SETS:
+            raise ValueError(f"Unknown piece set: {piece_set}")
+        self.piece_set = piece_set
+        self.size = size
+        self._sprites = None
+
+    def set_piece_set(self, piece_set):
+        if piece_set not in PIECE_SETS:
+            raise ValueError(f"Unknown piece set: {piece_set}")
+        if piece_set != self.piece_set:
+            self.piece_set = piece_set
+            self._sprites = None
+
+    def set_size(self, size):
+        if size != self.size:
+            self.size = size
+            self._sprites = None
+
+    def get(self, piece):
+        """Return the surface for a chess.Piece."""
+        if self._sprites is None:
+            self._sprites = self._build()
+        return self._sprites[piece.color, piece.piece_type]
+
+    def _image_path(self, color_name, piece_name):
+        folder = os.path.join(IMAGES_PATH, self.piece_set)
+        path = os.path.join(folder, f'{color_name}_{piece_name}.png')
+        if not os.path.exists(path):
+            # The 80px set is stored as e.g. 'white_king (1).png'
+            path = os.path.join(folder, f'{color_name}_{piece_name} (1).png')
+        return path
+
+    def _build(self):
+        sprites = {}
+        # convert_alpha() needs a display surface to convert to
+        can_convert = pygame.display.get_surface() is not None
+        for color in chess.COLORS:
+            color_name = 'white' if color == chess.WHITE else 'black'
+            for piece_type, piece_name in PIECE_NAMES.items():
+                img = pygame.image.load(self._image_path(color_name, piece_name))
+                if can_convert:
+                    img = img.convert_alpha()
+                if img.get_size() != (self.size, self.size):
+                    img = pygame.transform.smoothscale(img, (self.size, self.size))
+                sprites[color, piece_type] = img
+        return sprites
@@ -0,0 +1,93 @@
+from collections import OrderedDict
+
+import chess
+import chess.syzygy
+
+from transposition import position_key
+
+# Probe results kept in memory (positions, per probe type)
+DEFAULT_CACHE_SIZE = 1 << 16
+
+
+class Tablebase:
+    """Syzygy WDL/DTZ probes with an LRU cache of the results.
+
+    WDL values are from the side to move: 2 win, 1 win that the 50-move
+    rule turns into a draw, 0 draw, -1 loss saved by the 50-move rule,
+    -2 loss. Probes return None when the position is not covered (too many
+    pieces, castling rights, or the table file is not on disk).
+    """
+
+    def __init__(self, path, cache_size=DEFAULT_CACHE_SIZE):
+        self.path = path
+        self.tables = chess.syzygy.open_tablebase(path)
+        # Table names such as 'KRPvKR' list one letter per piece
+        self.max_pieces = max((len(name) - 1 for name in self.tables.wdl), default=0)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def covers(self, board):
+        """True if the position has few enough pieces and no castling rights."""
+        return chess.popcount(board.occupied) <= self.max_pieces and not board.castling_rights
+
+    def _cached(self, board, kind, probe):
+        cache_key = (position_key(board), kind)
+        if cache_key in self._cache:
+            self._cache.move_to_end(cache_key)
+            self.hits += 1
+            return self._cache[cache_key]
+        self.misses += 1
+        value = probe(board)
+        self._cache[cache_key] = value
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return value
+
+    def probe_wdl(self, board):
+        if not self.covers(board):
+            return None
+        return self._cached(board, 'wdl', self.tables.get_wdl)
+
+    def probe_dtz(self, board):
+        if not self.covers(board):
+            return None
+        return self._cached(board, 'dtz', self.tables.get_dtz)
+
+    def root_move(self, board):
+        """Return (move, wdl) with the best tablebase result, or None if not covered.
+
+        Wins are converted as fast as possible (smallest distance to a
+        capture or pawn move), losses are dragged out as long as possible.
+        """
+        if not self.covers(board):
+            return None
+        best = None
+        best_rank = None
+        for move in list(board.legal_moves):
+            board.push(move)
+            try:
+                if board.is_checkmate():
+                    return move, 2
+                wdl = self.probe_wdl(board)
+                dtz = self.probe_dtz(board)
+            finally:
+                board.pop()
+            if wdl is None or dtz is None:
+                return None
+            # The probes are from the opponent's side
+            wdl = -wdl
+            rank = (wdl, -abs(dtz) if wdl > 0 else abs(dtz))
+            if best_rank is None or rank > best_rank:
+                best, best_rank = move, rank
+        if best is None:
+            return None
+        return best, best_rank[0]
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        self.tables.close()
@@ -0,0 +1,196 @@
+"""Search statistics and the sinks that receive them.
+
+A ChessAI builds a SearchStats after every move, but only when it has a
+sink to send it to (or verbose printing is on); otherwise nothing is
+collected.
+
+    ai.sinks.append(JsonLinesSink('search.jsonl'))
+    ai.sinks.append(CallbackSink(lambda stats: print(stats.nps)))
+"""
+import json
+import threading
+
+import chess
+
+
+class SearchStats:
+    """What one AI move cost and what the search found."""
+
+    def __init__(self, fen, color, move, source):
+        self.fen = fen
+        self.color = 'white' if color == chess.WHITE else 'black'
+        self.move = move.uci() if move else None
+        self.source = source  # 'search', 'book', 'tablebase' or 'ponder' (a ponder hit or miss, no move)
+        self.score = None
+        self.depth = 0
+        self.nodes = 0
+        self.time = 0.0
+        self.nodes_per_depth = {}
+        self.time_per_depth = {}
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.cutoff_positions = {}  # Index of the move that caused the cutoff -> count
+        self.tt_hits = 0
+        self.tt_misses = 0
+        self.tt_overwrites = 0
+        self.tablebase_hits = 0
+        self.null_move_cutoffs = 0
+        self.reductions = 0  # Late moves searched shallower, and how many of them had to be searched again
+        self.re_searches = 0
+        self.aspiration_researches = 0  # Root searches repeated because the score fell outside the window
+        self.pv = []
+        self.ponder_hit = None  # Only for 'ponder': whether the expected reply was played
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+
+    @property
+    def nps(self):
+        return self.nodes / self.time if self.time > 0 else 0.0
+
+    @property
+    def branching_factor(self):
+        """Effective branching factor: growth of the last iteration, or nodes^(1/depth)."""
+        depths = sorted(self.nodes_per_depth)
+        if len(depths) >= 2 and self.nodes_per_depth[depths[-2]]:
+            return self.nodes_per_depth[depths[-1]] / self.nodes_per_depth[depths[-2]]
+        if self.depth > 0 and self.nodes > 0:
+            return self.nodes ** (1 / self.depth)
+        return 0.0
+
+    @property
+    def tt_hit_rate(self):
+        probes = self.tt_hits + self.tt_misses
+        return self.tt_hits / probes if probes else 0.0
+
+    @property
+    def pruned(self):
+        return self.cutoffs / self.nodes if self.nodes else 0.0
+
+    def to_dict(self):
+        data = dict(vars(self))
+        data.update(nps=self.nps, branching_factor=self.branching_factor, tt_hit_rate=self.tt_hit_rate)
+        # JSON keys must be strings
+        for name in ('nodes_per_depth', 'time_per_depth', 'cutoff_positions'):
+            data[name] = {str(key): value for key, value in sorted(data[name].items())}
+        return data
+
+    def summary_lines(self):
+        """Short human-readable summary, used by the console and the overlay."""
+        if self.source == 'ponder':
+            total = self.ponder_hits + self.ponder_misses
+            rate = 100 * self.ponder_hits / total if total else 0.0
+            return [f"Ponder {'hit' if self.ponder_hit else 'miss'}, hit rate {rate:.0f}% "
+                    f"({self.ponder_hits}/{total})"]
+        if self.source != 'search':
+            return [f"{self.source.capitalize()} move: {self.move}"]
+        return [
+            f"Depth {self.depth}, nodes {self.nodes}, {self.nps:.0f} nodes/s, EBF {self.branching_factor:.2f}",
+            f"Cutoffs {self.cutoffs} ({100 * self.pruned:.1f}%), first move "
+            f"{self.first_move_cutoffs}/{self.cutoffs}, TT hits {100 * self.tt_hit_rate:.0f}%",
+            "PV " + ' '.join(self.pv[:8])
+        ]
+
+
+def publish(engine, stats, sinks):
+    """Make stats the engine's last_stats and send them to the sinks.
+
+    If the engine has a stats_gate (its search is a ponder search), the
+    gate decides whether and when that happens.
+    """
+    gate = getattr(engine, 'stats_gate', None)
+    if gate is not None:
+        gate.send(engine, stats, sinks)
+    else:
+        _emit(engine, stats, sinks)
+
+
+def _emit(engine, stats, sinks):
+    engine.last_stats = stats
+    for sink in sinks:
+        sink.emit(stats)
+
+
+class StatsGate:
+    """Holds back the statistics of a ponder search until its move is known to be played.
+
+    open() sends what was held and lets later statistics through (a ponder
+    hit); drop() throws them away (a miss, or the search was cancelled).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._open = False
+        self._dropped = False
+        self._held = []
+
+    def send(self, engine, stats, sinks):
+        with self._lock:
+            if self._dropped:
+                return
+            if not self._open:
+                self._held.append((engine, stats, sinks))
+                return
+        _emit(engine, stats, sinks)
+
+    def open(self):
+        with self._lock:
+            self._open = True
+            held, self._held = self._held, []
+        for engine, stats, sinks in held:
+            _emit(engine, stats, sinks)
+
+    def drop(self):
+        with self._lock:
+            self._dropped = True
+            self._held = []
+
+
+class ConsoleSink:
+    """Print a summary after every move (what verbose=True does)."""
+
+    def emit(self, stats):
+        for line in stats.summary_lines():
+            print(f"[AI Move] {line}")
+
+
+class JsonLinesSink:
+    """Append every SearchStats as one JSON line to a file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def emit(self, stats):
+        line = json.dumps(stats.to_dict())
+        with self._lock, open(self.path, 'a') as f:
+            f.write(line + '\n')
+
+
+class CallbackSink:
+    """Call a function with every SearchStats."""
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def emit(self, stats):
+        self.callback(stats)
+
+
+class OverlaySink:
+    """Keep the latest SearchStats for drawing over the board."""
+
+    def __init__(self):
+        self.latest = None
+        self.ponder = None  # Latest ponder result, shown below the move statistics
+
+    def emit(self, stats):
+        if stats.source == 'ponder':
+            self.ponder = stats
+        else:
+            self.latest = stats
+
+    def lines(self):
+        lines = self.latest.summary_lines() if self.latest is not None else []
+        if self.ponder is not None:
+            lines += self.ponder.summary_lines()
+        return lines
@@ -0,0 +1,116 @@
+from array import array
+
+import chess
+
+# Bound types stored with every entry
+EXACT = 0
+LOWERBOUND = 1
+UPPERBOUND = 2
+
+REPLACEMENT_POLICIES = ('depth', 'always')
+
+# Layout of an entry's data word: move in bits 0-15, flag 16-17, depth 18-25,
+# score + _SCORE_OFFSET 26-43 (room for mate scores), and a bit marking the slot used
+_FLAG_SHIFT = 16
+_DEPTH_SHIFT = 18
+_SCORE_SHIFT = 26
+_SCORE_OFFSET = 1 << 17
+_SCORE_MASK = (1 << 18) - 1
+_USED = 1 << 44
+# Decoded moves, shared by every table
+_MOVES = {}
+
+
+def position_key(board):
+    """Return a hashable key of a position: pieces, side to move, castling and en passant.
+
+    python-chess keeps these as bitboards, so the key is a small tuple built
+    without looking at the squares. chess.polyglot.zobrist_hash would rehash
+    the whole board at every node. Only ints go in (no en passant square is
+    -1, not None), so hash(key) and the slot are the same in every process.
+    """
+    ep_square = board.ep_square if board.ep_square is not None and board.has_legal_en_passant() else -1
+    return (board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings,
+            board.occupied_co[chess.WHITE], board.occupied_co[chess.BLACK], board.turn,
+            board.clean_castling_rights(), ep_square)
+
+
+class TranspositionTable:
+    """Fixed-size hash table of searched positions.
+
+    An entry is two 64-bit words in flat arrays: hash(key), which also
+    picks the slot (hash(key) % size) and tells positions sharing a slot
+    apart, and the depth, score, bound type and best move packed into one
+    integer. That is 16 bytes per slot, so the default 2^20 slots take
+    16 MB. probe() returns the entry as a tuple (hash, depth, score, flag,
+    move).
+    """
+
+    def __init__(self, size=1 << 20, replacement='depth'):
+        if size <= 0:
+            raise ValueError("Transposition table size must be positive")
+        if replacement not in REPLACEMENT_POLICIES:
+            raise ValueError(f"Unknown replacement policy: {replacement}")
+        self.size = size
+        self.replacement = replacement
+        self._allocate()
+        self.hits = 0
+        self.misses = 0
+        self.overwrites = 0
+
+    def _allocate(self):
+        self.hashes = array('q', bytes(8 * self.size))
+        self.data = array('q', bytes(8 * self.size))  # 0 = empty slot
+
+    def probe(self, key):
+        """Return the entry stored for key, or None."""
+        key_hash = hash(key)
+        index = key_hash % self.size
+        data = self.data[index]
+        if data and self.hashes[index] == key_hash:
+            self.hits += 1
+            return (key_hash, (data >> _DEPTH_SHIFT) & 0xFF, ((data >> _SCORE_SHIFT) & _SCORE_MASK) - _SCORE_OFFSET,
+                    (data >> _FLAG_SHIFT) & 3, _decode_move(data & 0xFFFF))
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, score, flag, move):
+        """Store a search result, following the replacement policy."""
+        key_hash = hash(key)
+        index = key_hash % self.size
+        old = self.data[index]
+        if old:
+            # Depth-preferred: never replace a deeper result with a shallower one
+            if self.replacement == 'depth' and (old >> _DEPTH_SHIFT) & 0xFF > depth:
+                return
+            if self.hashes[index] != key_hash:
+                self.overwrites += 1
+        self.hashes[index] = key_hash
+        self.data[index] = (_USED | (int(score) + _SCORE_OFFSET) << _SCORE_SHIFT | depth << _DEPTH_SHIFT |
+                            flag << _FLAG_SHIFT | _encode_move(move))
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.overwrites = 0
+
+    def clear(self):
+        """Forget all stored positions (e.g. when a new game starts)."""
+        self._allocate()
+        self.reset_stats()
+
+
+def _encode_move(move):
+    """16 bits: to square, from square, promotion piece type (0 = no move)."""
+    if move is None:
+        return 0
+    return move.to_square | (move.from_square << 6) | ((move.promotion or 0) << 12)
+
+
+def _decode_move(value):
+    if value == 0:
+        return None
+    move = _MOVES.get(value)
+    if move is None:
+        move = _MOVES[value] = chess.Move(value >> 6 & 63, value & 63, value >> 12 or None)
+    return move
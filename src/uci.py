@@ -0,0 +1,212 @@
+"""UCI front end for ChessAI, for chess GUIs and match runners.
+
+    python src/uci.py
+
+Imports no pygame, so it starts quickly and needs no display or audio.
+"""
+import sys
+import threading
+import time
+
+import chess
+
+from ai import ChessAI, MAX_DEPTH, format_score
+
+ENGINE_NAME = "Chess-game ChessAI"
+ENGINE_AUTHOR = "Chess-game contributors"
+
+# 'go' parameters followed by a number, and those that stand alone
+GO_NUMBERS = ('wtime', 'btime', 'winc', 'binc', 'movestogo', 'depth', 'nodes', 'mate', 'movetime')
+GO_FLAGS = ('infinite', 'ponder')
+
+
+class UCIEngine:
+    """Reads UCI commands and runs searches on a background thread."""
+
+    def __init__(self, output=sys.stdout):
+        self.output = output
+        self.board = chess.Board()
+        # The AI plays the side to move, so keep one per color
+        self.engines = {}
+        self._output_lock = threading.Lock()
+        self._search_thread = None
+        self._stop_event = None
+        self._ponder_time = None  # Time for the move once a ponder search becomes a real one
+
+    def send(self, line):
+        with self._output_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def engine_for(self, color):
+        if color not in self.engines:
+            ai = ChessAI(color)
+            ai.verbose = False  # stdout belongs to the protocol
+            self.engines[color] = ai
+        return self.engines[color]
+
+    def handle(self, line):
+        """Process one command line; returns False on 'quit'."""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+        if command == 'uci':
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            self.send("uciok")
+        elif command == 'isready':
+            self.send("readyok")
+        elif command == 'ucinewgame':
+            self.stop()
+            self.board = chess.Board()
+            for ai in self.engines.values():
+                ai.reset()
+        elif command == 'position':
+            self.stop()
+            self.set_position(args)
+        elif command == 'go':
+            self.go(args)
+        elif command == 'stop':
+            self.stop()
+        elif command == 'ponderhit':
+            self.ponderhit()
+        elif command == 'quit':
+            self.stop()
+            return False
+        return True
+
+    def set_position(self, args):
+        if 'moves' in args:
+            index = args.index('moves')
+            setup, moves = args[:index], args[index + 1:]
+        else:
+            setup, moves = args, []
+        try:
+            board = chess.Board(' '.join(setup[1:])) if setup and setup[0] == 'fen' else chess.Board()
+        except ValueError as error:
+            self.send(f"info string invalid position: {error}")
+            return
+        for uci in moves:
+            try:
+                board.push_uci(uci)
+            except ValueError:
+                # Keep the moves before it, so a later 'go' still has a position to search
+                self.send(f"info string illegal move {uci}, position set up to the move before it")
+                break
+        self.board = board
+
+    def parse_go(self, args):
+        """The parameters of a 'go' command as a dict; unknown or malformed tokens are skipped."""
+        options = {}
+        index = 0
+        while index < len(args):
+            name = args[index]
+            index += 1
+            if name in GO_FLAGS:
+                options[name] = True
+            elif name == 'searchmoves':
+                # Moves up to the next parameter name
+                moves = []
+                while index < len(args) and args[index] not in GO_NUMBERS + GO_FLAGS:
+                    try:
+                        move = chess.Move.from_uci(args[index])
+                    except ValueError:
+                        move = None
+                    if move is not None and self.board.is_legal(move):
+                        moves.append(move)
+                    index += 1
+                options[name] = moves
+            elif name in GO_NUMBERS and index < len(args):
+                try:
+                    options[name] = int(args[index])
+                except ValueError:
+                    continue  # Not a number: read it as the next parameter name
+                index += 1
+        return options
+
+    def go(self, args):
+        self.stop()
+        options = self.parse_go(args)
+        depth = options.get('depth') or MAX_DEPTH
+        node_limit = options.get('nodes')
+        time_limit = None
+        if 'movetime' in options:
+            time_limit = options['movetime'] / 1000
+        elif not options.get('infinite'):
+            time_limit = self._time_from_clock(options)
+        if options.get('ponder'):
+            # Search without a limit until 'ponderhit' (then the move gets its time) or 'stop'
+            self._ponder_time = time_limit
+            time_limit = None
+
+        self._stop_event = threading.Event()
+        self._search_thread = threading.Thread(
+            target=self._search,
+            args=(self.board.copy(), depth, time_limit, node_limit, self._stop_event, options.get('searchmoves')),
+            daemon=True)
+        self._search_thread.start()
+
+    def ponderhit(self):
+        """The expected move was played: the ponder search now only has the move's time left."""
+        if self._stop_event is None or self._ponder_time is None:
+            return
+        timer = threading.Timer(self._ponder_time, self._stop_event.set)
+        timer.daemon = True
+        timer.start()
+        self._ponder_time = None
+
+    def _time_from_clock(self, options):
+        """Share of the remaining clock time for this move, in seconds (None = no clock given)."""
+        remaining = options.get('wtime' if self.board.turn == chess.WHITE else 'btime')
+        if remaining is None:
+            return None
+        increment = options.get('winc' if self.board.turn == chess.WHITE else 'binc') or 0
+        moves_to_go = options.get('movestogo') or 30
+        return max(remaining / moves_to_go + increment / 2, 10) / 1000
+
+    def _search(self, board, depth, time_limit, node_limit, stop_event, root_moves=None):
+        ai = self.engine_for(board.turn)
+        start = time.perf_counter()
+
+        def report(depth_done, move, score):
+            elapsed = time.perf_counter() - start
+            self.send(f"info depth {depth_done} score {format_score(score)} "
+                      f"nodes {ai.calculations} nps {int(ai.calculations / max(elapsed, 1e-6))} "
+                      f"time {int(elapsed * 1000)} pv {move.uci()}")
+
+        ai.on_iteration = report
+        try:
+            move = ai.get_best_move(board, depth=depth, time_limit=time_limit, node_limit=node_limit,
+                                    stop_event=stop_event, iterative=True, root_moves=root_moves)
+        finally:
+            ai.on_iteration = None
+        elapsed = time.perf_counter() - start
+        self.send(f"info nodes {ai.calculations} nps {int(ai.calculations / max(elapsed, 1e-6))} "
+                  f"time {int(elapsed * 1000)}")
+        self.send(f"bestmove {move.uci() if move else '0000'}")
+
+    def stop(self):
+        """Stop a running search; it still reports its best move."""
+        if self._stop_event is not None:
+            self._stop_event.set()
+        if self._search_thread is not None:
+            self._search_thread.join()
+        self._search_thread = None
+        self._stop_event = None
+        self._ponder_time = None
+
+
+def main():
+    engine = UCIEngine()
+    for line in sys.stdin:
+        try:
+            if not engine.handle(line.strip()):
+                break
+        except Exception as error:
+            # A bad command must not end the engine: the GUI would only see it disappear
+            engine.send(f"info string error: {type(error).__name__}: {error}")
+
+
+if __name__ == "__main__":
+    main()
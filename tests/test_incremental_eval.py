@@ -0,0 +1,56 @@
+import chess
+import pytest
+
+from ai import ChessAI, MATE_SCORE
+
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+EN_PASSANT = "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3"
+PROMOTIONS = "n1n5/PPPk4/8/8/8/8/4Kppp/5N1N b - - 0 1"
+
+
+def _walk(ai, board, depth):
+    """Push every move to depth, checking the running score against a full rescan."""
+    if depth == 0:
+        return
+    for move in list(board.legal_moves):
+        before = ai._score
+        ai._push(board, move)
+        assert ai._score == ai._material_score(board), move.uci()
+        _walk(ai, board, depth - 1)
+        ai._pop(board)
+        assert ai._score == before
+
+
+@pytest.mark.parametrize('fen', [chess.STARTING_FEN, KIWIPETE, EN_PASSANT, PROMOTIONS])
+@pytest.mark.parametrize('color', [chess.WHITE, chess.BLACK])
+def test_running_score_matches_rescan(fen, color):
+    # Castling, en passant, promotions and captures all change more than one square
+    board = chess.Board(fen)
+    ai = ChessAI(color)
+    ai._start_search(board)
+    _walk(ai, board, 2)
+    assert not ai._score_stack
+
+
+def test_incremental_matches_evaluate_board():
+    board = chess.Board(KIWIPETE)
+    ai = ChessAI(chess.WHITE)
+    ai._start_search(board)
+    for move in list(board.legal_moves):
+        ai._push(board, move)
+        # evaluate_board is from the AI's view, the incremental score from the side to move's
+        assert -ai._evaluate_incremental(board, 1) == ai.evaluate_board(board)
+        ai._pop(board)
+
+
+def test_incremental_game_over_scores():
+    ai = ChessAI(chess.WHITE)
+    mated = chess.Board("rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3")
+    ai._start_search(mated)
+    assert ai._evaluate_incremental(mated, 3) == 3 - MATE_SCORE
+    stalemate = chess.Board("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1")
+    ai._start_search(stalemate)
+    assert ai._evaluate_incremental(stalemate, 1) == 0
+    bare_kings = chess.Board("8/8/4k3/8/8/3K4/8/8 w - - 0 1")
+    ai._start_search(bare_kings)
+    assert ai._evaluate_incremental(bare_kings, 0) == 0
@@ -0,0 +1,31 @@
+import chess
+import pytest
+
+from ai import ChessAI
+from parallel_search import ParallelSearch
+
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+
+
+@pytest.fixture(params=[1, 3])
+def search(request):
+    search = ParallelSearch(chess.WHITE, workers=request.param)
+    search.verbose = False
+    yield search
+    search.close()
+
+
+def test_same_move_and_score_as_serial(search):
+    serial = ChessAI(chess.WHITE)
+    serial.verbose = False
+    move = serial.get_best_move(chess.Board(KIWIPETE), depth=3)
+    assert search.get_best_move(chess.Board(KIWIPETE), depth=3) == move
+    assert search.best_score == serial.best_score
+
+
+@pytest.mark.parametrize('node_limit', [200, 3000])
+def test_node_limit_holds_across_workers(search, node_limit):
+    move = search.get_best_move(chess.Board(KIWIPETE), node_limit=node_limit)
+    assert move in chess.Board(KIWIPETE).legal_moves
+    # Nodes of aborted tasks count too, and the tasks in flight share what is left
+    assert node_limit * 0.9 <= search.calculations <= node_limit
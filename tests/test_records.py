@@ -0,0 +1,108 @@
+import io
+import os
+
+import chess
+import chess.pgn
+import pytest
+
+from records import GameReader, GameRecord, GameWriter, MoveStats, decode_move, encode_move
+
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+
+
+def _played(fen, count):
+    """A board with `count` moves played from fen (first legal move each time)."""
+    board = chess.Board(fen)
+    for _ in range(count):
+        board.push(next(iter(board.legal_moves)))
+    return board
+
+
+def _same(one, two):
+    assert one.moves == two.moves
+    assert (one.result, one.fen, one.white, one.black) == (two.result, two.fen, two.white, two.black)
+    assert (one.workers, one.time_limit, one.end_time, one.stats) == (two.workers, two.time_limit,
+                                                                      two.end_time, two.stats)
+
+
+@pytest.mark.parametrize('uci', ['e2e4', 'a7a8q', 'h2h1n', 'e1g1', 'b7c8r'])
+def test_move_encoding_round_trip(uci):
+    move = chess.Move.from_uci(uci)
+    assert decode_move(encode_move(move)) == move
+
+
+def test_null_move_encoding():
+    assert decode_move(encode_move(chess.Move.null())) == chess.Move.null()
+
+
+def test_pack_and_read_round_trip(tmp_path):
+    path = str(tmp_path / 'games.cgr')
+    records = [
+        GameRecord.from_board(_played(chess.STARTING_FEN, 6), white='human', black='ai', workers=4,
+                              time_limit=1.5, end_time=1700000000,
+                              stats=[None, MoveStats(35, 1200, 0.25, 3, 'search')] * 3),
+        GameRecord.from_board(_played(KIWIPETE, 3), end_time=1700000001),
+        GameRecord([], result='1/2-1/2', white='Anna', black='Zoë', end_time=1700000002),
+    ]
+    with GameWriter(path) as writer:
+        for record in records:
+            writer.write(record)
+    with GameReader(path) as reader:
+        read = list(reader)
+        assert reader.results() == {'*': 2, '1-0': 0, '0-1': 0, '1/2-1/2': 1}
+    assert len(read) == len(records)
+    for one, two in zip(records, read):
+        _same(one, two)
+    assert read[1].final_board().fen() == _played(KIWIPETE, 3).fen()
+
+
+def test_out_of_range_stats_are_clamped(tmp_path):
+    path = str(tmp_path / 'games.cgr')
+    record = GameRecord([chess.Move.from_uci('e2e4')], end_time=0,
+                        stats=[MoveStats(100000, 1 << 40, 0.0, 300, 'book')])
+    with GameWriter(path) as writer:
+        writer.write(record)
+    with GameReader(path) as reader:
+        assert next(iter(reader)).stats == [MoveStats(32767, 0xFFFFFFFF, 0.0, 255, 'book')]
+
+
+def test_writer_drops_a_torn_last_record(tmp_path):
+    path = str(tmp_path / 'games.cgr')
+    first = GameRecord.from_board(_played(chess.STARTING_FEN, 4), end_time=1)
+    with GameWriter(path) as writer:
+        writer.write(first)
+        writer.write(GameRecord.from_board(_played(chess.STARTING_FEN, 8), end_time=2))
+    # A crash in the middle of the second record
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) - 3)
+    with GameReader(path) as reader:
+        assert len(list(reader)) == 1
+    last = GameRecord.from_board(_played(KIWIPETE, 2), end_time=3)
+    with GameWriter(path) as writer:
+        writer.write(last)
+    with GameReader(path) as reader:
+        read = list(reader)
+    assert len(read) == 2
+    _same(read[0], first)
+    _same(read[1], last)
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / 'notes.txt'
+    path.write_bytes(b'not a records file')
+    with pytest.raises(ValueError):
+        GameWriter(str(path))
+    with pytest.raises(ValueError):
+        GameReader(str(path))
+
+
+def test_pgn_round_trip_keeps_names_and_position():
+    game = chess.pgn.read_game(io.StringIO(
+        '[White "Ada"]\n[Black "Grace"]\n[Result "1-0"]\n'
+        f'[FEN "{KIWIPETE}"]\n[SetUp "1"]\n\n1. Bxa6 b3 2. Nxf7 1-0\n'))
+    record = GameRecord.from_pgn(game)
+    assert (record.white, record.black, record.result, record.fen) == ('Ada', 'Grace', '1-0', KIWIPETE)
+    back = record.to_pgn()
+    assert back.headers['White'] == 'Ada'
+    assert back.headers['Black'] == 'Grace'
+    assert list(back.mainline_moves()) == record.moves
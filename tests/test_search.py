@@ -0,0 +1,135 @@
+import chess
+import pytest
+
+from ai import ChessAI, MATE_BOUND, MATE_SCORE, _score_from_tt, _score_to_tt, format_score, mate_distance
+
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+ITALIAN = "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3"
+ROOK_ENDGAME = "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"
+# White mates in two with the rook ladder: 1. Ra7 Kg8 2. Rb8#
+MATE_IN_TWO = "7k/8/8/8/8/8/R7/1R4K1 w - - 0 1"
+
+
+def _search(fen, depth, **options):
+    board = chess.Board(fen)
+    ai = ChessAI(board.turn, endgame_depth=None, **options)
+    ai.verbose = False
+    move = ai.get_best_move(board, depth=depth)
+    assert board.fen() == fen  # Every move the search made was taken back
+    return move, ai.best_score
+
+
+@pytest.mark.parametrize('fen', [chess.STARTING_FEN, ITALIAN, KIWIPETE, ROOK_ENDGAME])
+def test_pvs_scores_like_minimax(fen):
+    # The null windows and re-searches only prune: the root score must be minimax's
+    _, minimax_score = _search(fen, 3, use_alpha_beta=False, tt_size=0)
+    _, pvs_score = _search(fen, 3, use_pvs=True)
+    _, plain_score = _search(fen, 3, use_pvs=False)
+    assert pvs_score == plain_score == minimax_score
+
+
+@pytest.mark.parametrize('fen', [ITALIAN, KIWIPETE])
+def test_aspiration_windows_keep_the_score(fen):
+    board = chess.Board(fen)
+    scores = []
+    for window in (10, None):
+        ai = ChessAI(board.turn, aspiration_window=window)
+        ai.verbose = False
+        ai.get_best_move(board, depth=4, iterative=True)
+        scores.append(ai.best_score)
+    assert scores[0] == scores[1]
+
+
+def test_mate_in_one_at_the_root():
+    move, score = _search("6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1", 3)
+    assert move == chess.Move.from_uci('a1a8')
+    assert score == MATE_SCORE - 1
+    assert format_score(score) == 'mate 1'
+
+
+def test_mate_in_two_is_scored_by_distance():
+    move, score = _search(MATE_IN_TWO, 3)
+    assert move == chess.Move.from_uci('a2a7')
+    assert score == MATE_SCORE - 3
+    assert mate_distance(score) == 2
+
+
+def test_getting_mated_is_negative():
+    # Black's only move is Kg8, then Rb8#
+    _, score = _search("7k/R7/8/8/8/8/8/1R4K1 b - - 0 1", 3)
+    assert score == 2 - MATE_SCORE
+    assert mate_distance(score) == -1
+
+
+@pytest.mark.parametrize('score, text', [
+    (MATE_SCORE - 1, 'mate 1'), (MATE_SCORE - 3, 'mate 2'),
+    (2 - MATE_SCORE, 'mate -1'), (4 - MATE_SCORE, 'mate -2'),
+    (35, 'cp 35'), (-120, 'cp -120'), (0, 'cp 0'),
+])
+def test_format_score(score, text):
+    assert format_score(score) == text
+
+
+@pytest.mark.parametrize('score', [MATE_SCORE - 5, 7 - MATE_SCORE, 150, -150, 0])
+def test_tt_scores_round_trip(score):
+    for ply in (0, 1, 6):
+        assert _score_from_tt(_score_to_tt(score, ply), ply) == score
+    # A mate stored at ply 2 is two plies closer when read at ply 4
+    if score >= MATE_BOUND:
+        assert _score_from_tt(_score_to_tt(score, 2), 4) == score - 2
+
+
+class _FullCheckAI(ChessAI):
+    """The lean node handling turned off: rescans and python-chess's game-over checks at every node."""
+
+    def _evaluate_incremental(self, board, ply):
+        if board.is_checkmate():
+            return ply - MATE_SCORE
+        if board.is_stalemate() or board.is_insufficient_material():
+            return 0
+        score = self._material_score(board)
+        return score if board.turn == self.color else -score
+
+    def _game_over_score(self, board, moves, ply):
+        if not board.is_game_over():
+            return None
+        if board.is_checkmate():
+            return ply - MATE_SCORE
+        if board.is_stalemate() or board.is_insufficient_material():
+            return 0
+        # Seventy-five moves or fivefold repetition
+        score = self._material_score(board)
+        return score if board.turn == self.color else -score
+
+
+def _search_stats(fen, depth, ai_class=ChessAI, **options):
+    board = chess.Board(fen)
+    ai = ai_class(board.turn, endgame_depth=None, **options)
+    ai.verbose = False
+    move = ai.get_best_move(board, depth=depth)
+    return move, ai.best_score, ai.calculations
+
+
+@pytest.mark.parametrize('fen', [chess.STARTING_FEN, ITALIAN, KIWIPETE, ROOK_ENDGAME, MATE_IN_TWO])
+@pytest.mark.parametrize('depth', [2, 3])
+def test_numpy_backend_matches_python(fen, depth):
+    pytest.importorskip('numpy')
+    # Without the table the batch replays exactly the same tree
+    assert (_search_stats(fen, depth, eval_backend='numpy', tt_size=0) ==
+            _search_stats(fen, depth, eval_backend='python', tt_size=0))
+    # With it, depth-1 children are not stored, so only the move and score must agree
+    assert (_search_stats(fen, depth, eval_backend='numpy')[:2] ==
+            _search_stats(fen, depth, eval_backend='python')[:2])
+
+
+# The mate positions need the terminal checks; the last one ends in a seventy-five-move draw
+FULL_CHECK_FENS = [ITALIAN, KIWIPETE, ROOK_ENDGAME, MATE_IN_TWO, "7k/R7/8/8/8/8/8/1R4K1 b - - 0 1",
+                   "8/8/4k3/8/8/3K4/3R4/8 w - - 149 120"]
+
+
+@pytest.mark.parametrize('fen', FULL_CHECK_FENS)
+@pytest.mark.parametrize('options', [{}, {'use_null_move': True, 'use_lmr': True}])
+def test_lean_node_handling_matches_full_checks(fen, options):
+    # Same tree, so the same move, score and node count
+    assert (_search_stats(fen, 4, **options) ==
+            _search_stats(fen, 4, _FullCheckAI, **options))
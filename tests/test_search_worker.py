@@ -0,0 +1,63 @@
+import threading
+import time
+
+import chess
+
+from ai import ChessAI
+from search_worker import SearchWorker
+from telemetry import CallbackSink
+
+
+def _ai():
+    ai = ChessAI(chess.BLACK)
+    ai.verbose = False
+    reports = []
+    ai.sinks.append(CallbackSink(reports.append))
+    return ai, reports
+
+
+def _wait(worker):
+    deadline = time.monotonic() + 60
+    while True:
+        move = worker.poll()
+        if move is not None:
+            return move
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def _after(*ucis):
+    board = chess.Board()
+    for uci in ucis:
+        board.push_uci(uci)
+    return board
+
+
+def test_ponder_miss_reports_nothing():
+    ai, reports = _ai()
+    worker = SearchWorker(ai)
+    worker.ponder(_after('e2e4', 'e7e5'), chess.Move.from_uci('g1f3'))
+    worker._thread.join()  # The ponder search finishes before the player moves
+    assert reports == [] and ai.last_stats is None
+    worker.start(_after('e2e4', 'e7e5', 'd2d4'))
+    move = _wait(worker)
+    assert [(stats.source, stats.move) for stats in reports] == [('search', move.uci())]
+    assert ai.last_stats is reports[0]
+
+
+def test_ponder_hit_reports_the_ponder_search():
+    ai, reports = _ai()
+    worker = SearchWorker(ai)
+    worker.ponder(_after('e2e4', 'e7e5'), chess.Move.from_uci('g1f3'))
+    worker.start(_after('e2e4', 'e7e5', 'g1f3'))
+    move = _wait(worker)
+    assert worker.ponder_hits == 1
+    assert [stats.move for stats in reports] == [move.uci()]
+
+
+def test_cancelled_search_reports_nothing():
+    ai, reports = _ai()
+    stop_event = threading.Event()
+    stop_event.set()
+    ai.get_best_move(_after('e2e4'), stop_event=stop_event)
+    assert reports == [] and ai.last_stats is None
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import chess
+import pytest
+
+from service import EngineService, RemoteAI, ServiceClient, ServiceError
+
+
+class _Writer:
+    """Collects what _respond writes, like an asyncio StreamWriter."""
+
+    def __init__(self):
+        self.replies = []
+
+    def write(self, data):
+        self.replies.append(json.loads(data))
+
+    async def drain(self):
+        pass
+
+    def is_closing(self):
+        return False
+
+
+@pytest.fixture
+def service():
+    service = EngineService(workers=1, time_limit=0.2)
+    yield service
+    service.close()
+
+
+def _reply(service, line, owned=None):
+    """The one reply the service sends for a request line."""
+    async def respond():
+        writer = _Writer()
+        await service._respond(line, writer, set() if owned is None else owned)
+        return writer.replies
+
+    replies = asyncio.run(respond())
+    assert len(replies) == 1
+    return replies[0]
+
+
+@pytest.mark.parametrize('line, error', [
+    ('not json', 'JSONDecodeError'),
+    ('[1, 2]', 'a request must be a JSON object'),
+    ('{"id": 7}', "KeyError: 'op'"),
+    ('{"id": 7, "op": "go", "session": 99}', 'no session 99'),
+    ('{"id": 7, "op": "new", "time_limit": 0}', 'time_limit must be positive'),
+    ('{"id": 7, "op": "new", "time_limit": "fast"}', 'ValueError'),
+    ('{"id": 7, "op": "new", "depth": -1}', 'depth must be positive'),
+    ('{"id": 7, "op": "new", "fen": "not a fen"}', 'ValueError'),
+])
+def test_bad_requests_get_an_error_reply(service, line, error):
+    reply = _reply(service, line)
+    assert error in reply['error']
+    assert reply['id'] == (7 if '"id"' in line else None)
+    assert not service.sessions
+
+
+def test_session_requests(service):
+    owned = set()
+    new = _reply(service, '{"id": 1, "op": "new", "depth": 1}', owned)
+    session = new['session']
+    assert owned == {session}
+    assert new['fen'] == chess.STARTING_FEN
+    pushed = _reply(service, json.dumps({'id': 2, 'op': 'push', 'session': session, 'moves': ['e2e4', 'e7e5']}))
+    assert pushed['fen'] == chess.Board('rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2').fen()
+    illegal = _reply(service, json.dumps({'id': 3, 'op': 'push', 'session': session, 'moves': ['e1e3']}))
+    assert 'illegal move e1e3' in illegal['error']
+    unknown = _reply(service, json.dumps({'id': 4, 'op': 'jump', 'session': session}))
+    assert "unknown op 'jump'" in unknown['error']
+    state = _reply(service, json.dumps({'id': 5, 'op': 'state', 'session': session}))
+    assert state['moves'] == ['e2e4', 'e7e5'] and state['result'] == '*'
+    closed = _reply(service, json.dumps({'id': 6, 'op': 'close', 'session': session}), owned)
+    assert closed == {'closed': session, 'id': 6}
+    assert not owned and not service.sessions
+
+
+def test_go_after_game_over_is_an_error(service):
+    mated = "rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3"
+    session = _reply(service, json.dumps({'op': 'new', 'fen': mated}))['session']
+    reply = _reply(service, json.dumps({'id': 1, 'op': 'go', 'session': session}))
+    assert 'the game is over' in reply['error']
+
+
+async def _cancel_tasks():
+    # Forked pool workers keep copies of the client sockets, so the handlers may never see EOF
+    tasks = asyncio.all_tasks() - {asyncio.current_task()}
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@pytest.fixture
+def address(service):
+    """The service listening on a Unix socket, served from a background event loop."""
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'engine.sock')
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    serving = asyncio.run_coroutine_threadsafe(service.serve(unix_path=path), loop)
+    deadline = time.monotonic() + 10
+    while not os.path.exists(path):
+        assert time.monotonic() < deadline and not serving.done()
+        time.sleep(0.01)
+    yield 'unix:' + path
+    # The server and its connection handlers end before the loop stops
+    asyncio.run_coroutine_threadsafe(_cancel_tasks(), loop).result(timeout=10)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout=10)
+    loop.close()
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def test_client_plays_through_the_socket(address):
+    client = ServiceClient(address)
+    try:
+        session = client.request({'op': 'new', 'time_limit': 0.2, 'depth': 2})['session']
+        reply = client.request({'op': 'play', 'session': session, 'move': 'e2e4'})
+        board = chess.Board()
+        board.push_uci('e2e4')
+        assert chess.Move.from_uci(reply['move']) in board.legal_moves
+        assert reply['depth'] >= 1 and reply['nodes'] > 0 and reply['time'] > 0
+        assert reply['result'] == '*'
+        with pytest.raises(ServiceError, match='illegal move'):
+            client.request({'op': 'push', 'session': session, 'moves': ['e2e4']})
+        metrics = client.request({'op': 'metrics'})
+        assert metrics['sessions'] == 1
+    finally:
+        client.close()
+
+
+def test_remote_ai_chooses_a_move(address):
+    ai = RemoteAI(chess.BLACK, address, time_limit=0.2, depth=2)
+    ai.verbose = False
+    try:
+        board = chess.Board()
+        board.push_uci('d2d4')
+        move = ai.choose_move(board)
+        assert move in board.legal_moves
+        assert ai.last_pv == [move]
+        # The next search only sends the moves the service has not seen
+        board.push(move)
+        board.push_uci('c2c4')
+        assert ai.choose_move(board) in board.legal_moves
+    finally:
+        ai.close()
@@ -0,0 +1,108 @@
+import chess
+import pytest
+
+from transposition import EXACT, LOWERBOUND, UPPERBOUND, TranspositionTable, position_key
+
+
+def _key(fen):
+    return position_key(chess.Board(fen))
+
+
+START = _key(chess.STARTING_FEN)
+AFTER_E4 = _key("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1")
+
+
+def test_depth_preferred_keeps_deeper_entry():
+    # One slot, so every key collides
+    tt = TranspositionTable(size=1, replacement='depth')
+    tt.store(START, 4, 10, EXACT, None)
+    tt.store(AFTER_E4, 2, 20, EXACT, None)
+    assert tt.probe(START)[1:3] == (4, 10)
+    assert tt.probe(AFTER_E4) is None
+    assert tt.overwrites == 0
+    # Equal or deeper results replace it
+    tt.store(AFTER_E4, 4, 30, LOWERBOUND, None)
+    assert tt.probe(AFTER_E4)[1:4] == (4, 30, LOWERBOUND)
+    assert tt.overwrites == 1
+
+
+def test_depth_preferred_same_position_keeps_deeper_result():
+    tt = TranspositionTable(size=16)
+    tt.store(START, 5, 10, EXACT, None)
+    tt.store(START, 3, 99, EXACT, None)
+    assert tt.probe(START)[1:3] == (5, 10)
+    tt.store(START, 6, 12, EXACT, None)
+    assert tt.probe(START)[1:3] == (6, 12)
+    assert tt.overwrites == 0  # Same position: an update, not an overwrite
+
+
+def test_always_replaces():
+    tt = TranspositionTable(size=1, replacement='always')
+    tt.store(START, 8, 10, EXACT, None)
+    tt.store(AFTER_E4, 1, 20, EXACT, None)
+    assert tt.probe(START) is None
+    assert tt.probe(AFTER_E4)[1:3] == (1, 20)
+    assert tt.overwrites == 1
+
+
+def test_probe_counts_hits_and_misses():
+    tt = TranspositionTable(size=1)
+    tt.store(START, 1, 0, EXACT, None)
+    tt.probe(START)
+    tt.probe(AFTER_E4)  # Same slot, other position
+    assert (tt.hits, tt.misses) == (1, 1)
+    tt.clear()
+    assert tt.probe(START) is None
+    assert (tt.hits, tt.misses) == (0, 1)
+
+
+@pytest.mark.parametrize('size, replacement', [(0, 'depth'), (16, 'newest')])
+def test_invalid_settings(size, replacement):
+    with pytest.raises(ValueError):
+        TranspositionTable(size=size, replacement=replacement)
+
+
+def test_key_is_the_same_after_transposed_moves():
+    one = chess.Board()
+    two = chess.Board()
+    for move in ('g1f3', 'g8f6', 'b1c3'):
+        one.push_uci(move)
+    for move in ('b1c3', 'g8f6', 'g1f3'):
+        two.push_uci(move)
+    assert position_key(one) == position_key(two)
+    two.push_uci('b8c6')
+    assert position_key(one) != position_key(two)
+
+
+def test_key_ignores_en_passant_square_without_legal_capture():
+    # After e4 the en passant square is set, but no black pawn can take
+    board = chess.Board()
+    board.push_uci('e2e4')
+    assert position_key(board) == AFTER_E4
+    with_capture = chess.Board("rnbqkbnr/ppp1pppp/8/8/3pP3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 3")
+    without = chess.Board("rnbqkbnr/ppp1pppp/8/8/3pP3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 3")
+    assert position_key(with_capture) != position_key(without)
+
+
+def test_key_has_only_ints():
+    # hash(None) differs between processes, and the pool workers must pick the same slots
+    board = chess.Board("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+    assert all(isinstance(part, int) for part in position_key(board))
+
+
+@pytest.mark.parametrize('depth, score, flag, move', [
+    (0, 0, EXACT, None),
+    (64, 31999, LOWERBOUND, chess.Move.from_uci('e7e8q')),
+    (3, -31990, UPPERBOUND, chess.Move.from_uci('a2a1n')),
+    (7, -20000, EXACT, chess.Move.from_uci('h8a1')),
+])
+def test_entries_unpack_to_what_was_stored(depth, score, flag, move):
+    tt = TranspositionTable(size=16)
+    tt.store(START, depth, score, flag, move)
+    assert tt.probe(START) == (hash(START), depth, score, flag, move)
+
+
+def test_entries_take_sixteen_bytes():
+    tt = TranspositionTable(size=1 << 10)
+    assert tt.hashes.itemsize + tt.data.itemsize == 16
+    assert len(tt.hashes) == len(tt.data) == 1 << 10
@@ -0,0 +1,113 @@
+import io
+
+import chess
+import pytest
+
+from uci import UCIEngine
+
+
+def _engine():
+    return UCIEngine(output=io.StringIO())
+
+
+def _lines(engine):
+    return engine.output.getvalue().splitlines()
+
+
+def _wait(engine):
+    """Let the running search finish on its own (stop() would cut it short)."""
+    engine._search_thread.join(timeout=60)
+    assert not engine._search_thread.is_alive()
+
+
+@pytest.mark.parametrize('args, expected', [
+    ('depth 3', {'depth': 3}),
+    ('wtime 1000 btime 2000 winc 10 binc 20 movestogo 5',
+     {'wtime': 1000, 'btime': 2000, 'winc': 10, 'binc': 20, 'movestogo': 5}),
+    ('ponder wtime 100', {'ponder': True, 'wtime': 100}),
+    ('infinite', {'infinite': True}),
+    ('depth', {}),  # Value missing at the end
+    ('depth x movetime 50', {'movetime': 50}),  # Not a number: read as the next name
+    ('unknown 5 nodes 100', {'nodes': 100}),
+])
+def test_parse_go(args, expected):
+    assert _engine().parse_go(args.split()) == expected
+
+
+def test_parse_go_searchmoves_keeps_legal_moves():
+    options = _engine().parse_go('searchmoves e2e4 e2e5 zz d2d4 depth 2'.split())
+    assert options['searchmoves'] == [chess.Move.from_uci('e2e4'), chess.Move.from_uci('d2d4')]
+    assert options['depth'] == 2
+
+
+def test_position_with_moves():
+    engine = _engine()
+    engine.handle('position startpos moves e2e4 e7e5 g1f3')
+    assert engine.board.move_stack == [chess.Move.from_uci(uci) for uci in ('e2e4', 'e7e5', 'g1f3')]
+    engine.handle('position fen 8/8/4k3/8/8/3K4/8/8 w - - 0 1')
+    assert engine.board.fen() == '8/8/4k3/8/8/3K4/8/8 w - - 0 1'
+
+
+def test_illegal_move_keeps_the_moves_before_it():
+    engine = _engine()
+    engine.handle('position startpos moves e2e4 e2e4 d2d4')
+    assert engine.board.move_stack == [chess.Move.from_uci('e2e4')]
+    assert _lines(engine)[-1].startswith('info string illegal move e2e4')
+
+
+def test_invalid_fen_keeps_the_position():
+    engine = _engine()
+    engine.handle('position startpos moves e2e4')
+    engine.handle('position fen not a fen')
+    assert engine.board.move_stack == [chess.Move.from_uci('e2e4')]
+    assert _lines(engine)[-1].startswith('info string invalid position')
+
+
+def test_handshake_and_quit():
+    engine = _engine()
+    assert engine.handle('uci')
+    assert engine.handle('isready')
+    assert engine.handle('')
+    assert not engine.handle('quit')
+    assert _lines(engine) == ['id name Chess-game ChessAI', 'id author Chess-game contributors', 'uciok', 'readyok']
+
+
+def test_go_depth_reports_every_depth_and_a_bestmove():
+    engine = _engine()
+    engine.handle('position startpos')
+    engine.handle('go depth 2')
+    _wait(engine)
+    lines = _lines(engine)
+    assert lines[0].startswith('info depth 1 score cp ')
+    assert lines[1].startswith('info depth 2 score cp ')
+    move = chess.Move.from_uci(lines[-1].split()[1])
+    assert lines[-1].startswith('bestmove') and move in chess.Board().legal_moves
+
+
+def test_go_nodes_stops_at_the_limit():
+    engine = _engine()
+    engine.handle('position startpos')
+    engine.handle('go nodes 500')
+    _wait(engine)
+    lines = _lines(engine)
+    assert lines[-2].startswith('info nodes 500 ')
+    assert lines[-1].startswith('bestmove')
+
+
+def test_go_searchmoves_restricts_the_choice():
+    engine = _engine()
+    engine.handle('position startpos')
+    engine.handle('go depth 2 searchmoves a2a3 h2h3')
+    _wait(engine)
+    assert _lines(engine)[-1] in ('bestmove a2a3', 'bestmove h2h3')
+
+
+def test_ponder_search_waits_for_ponderhit():
+    engine = _engine()
+    engine.handle('position startpos moves e2e4')
+    engine.handle('go ponder movetime 50')
+    assert engine._ponder_time == 0.05
+    assert engine._search_thread.is_alive()  # No time limit while pondering
+    engine.handle('ponderhit')
+    _wait(engine)
+    assert _lines(engine)[-1].startswith('bestmove')